@@ -0,0 +1,112 @@
+"""
+2D annotations computed from the rendered object index pass. This module does not import bpy.
+
+The index map is the IndexOB pass (e.g. render_to_arrays(["index"])["index"] or the
+segmentation exr), where every pixel holds the pass_index of the visible object.
+Boxes and masks are therefore tight and account for occlusion, unlike projected
+3D bounding boxes. All objects are handled with one sort of the image.
+
+>>> anns = index_annotations(index_map)
+>>> anns[0]["bbox"], anns[0]["area"], anns[0]["segmentation"]
+
+A single index map only shows the visible part of every object. Occlusion ratios
+also need the amodal (unoccluded) area, counted on index maps rendered with each
+object alone:
+>>> amodal = {}
+>>> for obj in objects:
+...     for other in objects:
+...         other.hide_render = other is not obj
+...     amodal.update(amodal_areas(render_to_arrays(["index"])["index"]))
+>>> anns = index_annotations(index_map, amodal_area=amodal)
+>>> anns[0]["occlusion"]
+"""
+import numpy as np
+
+
+def _rle_counts(positions, num_pixels):
+    """
+    COCO run-length counts of a mask given its sorted column-major pixel positions.
+    """
+    breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+    run_starts = positions[np.r_[0, breaks]]
+    run_ends = positions[np.r_[breaks - 1, len(positions) - 1]] + 1
+    counts = np.empty(2 * len(run_starts), dtype=np.int64)
+    counts[0::2] = run_starts - np.r_[0, run_ends[:-1]]  # zeros before each run
+    counts[1::2] = run_ends - run_starts  # ones
+    if run_ends[-1] < num_pixels:
+        counts = np.append(counts, num_pixels - run_ends[-1])
+    return counts.tolist()
+
+
+def amodal_areas(index_map, background=0):
+    """
+    Count the pixels of every object in an index map, e.g. one rendered with a single
+    object visible to get its amodal area for index_annotations.
+
+    Args:
+        index_map (np.ndarray): (H, W) pass_index map.
+        background (int, optional): index of the background. Defaults to 0.
+
+    Returns:
+        dict: pass_index -> pixel count.
+    """
+    ids, counts = np.unique(np.rint(index_map).astype(np.int64), return_counts=True)
+    return {idx: count for idx, count in zip(ids.tolist(), counts.tolist()) if idx != background}
+
+
+def index_annotations(index_map, background=0, amodal_area=None, rle=True):
+    """
+    Compute per-object 2D annotations from an index map.
+
+    Args:
+        index_map (np.ndarray): (H, W) pass_index map.
+        background (int, optional): index of the background. Defaults to 0.
+        amodal_area (dict, optional): pass_index -> pixel count of the object rendered alone,
+            see amodal_areas and the module docstring. Needed for occlusion ratios. Defaults to None.
+        rle (bool, optional): compute COCO uncompressed RLE masks. Defaults to True.
+
+    Returns:
+        List[dict]: one dict per visible object, sorted by pass_index, with
+            "pass_index", "bbox" ([x, y, w, h] in pixels), "area" (visible pixels),
+            "occlusion" (1 - area / amodal area, None if unknown) and
+            "segmentation" ({"size": [H, W], "counts": [...]}, if rle).
+    """
+    height, width = index_map.shape
+    labels = np.rint(index_map).astype(np.int64).T.reshape(-1)  # column-major like COCO masks
+    order = np.argsort(labels, kind="stable")  # grouped by label, positions ascending within a group
+    ids, starts, areas = np.unique(labels[order], return_index=True, return_counts=True)
+    xs = order // height
+    ys = order % height
+    x_min = np.minimum.reduceat(xs, starts)
+    x_max = np.maximum.reduceat(xs, starts)
+    y_min = np.minimum.reduceat(ys, starts)
+    y_max = np.maximum.reduceat(ys, starts)
+
+    anns = []
+    for i, idx in enumerate(ids.tolist()):
+        if idx == background:
+            continue
+        ann = {
+            "pass_index": idx,
+            "bbox": [int(x_min[i]), int(y_min[i]), int(x_max[i] - x_min[i] + 1), int(y_max[i] - y_min[i] + 1)],
+            "area": int(areas[i]),
+            "occlusion": None,
+        }
+        if amodal_area is not None and amodal_area.get(idx):
+            ann["occlusion"] = max(0.0, 1.0 - float(areas[i]) / amodal_area[idx])
+        if rle:
+            positions = order[starts[i] : starts[i] + areas[i]]
+            ann["segmentation"] = {"size": [height, width], "counts": _rle_counts(positions, height * width)}
+        anns.append(ann)
+    return anns
+
+
+def decode_rle(rle):
+    """
+    Decode a COCO uncompressed RLE into a (H, W) boolean mask.
+    """
+    height, width = rle["size"]
+    values = np.zeros(len(rle["counts"]), dtype=bool)
+    values[1::2] = True
+    mask = np.repeat(values, rle["counts"])
+    return mask.reshape(width, height).T
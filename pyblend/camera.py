@@ -1,6 +1,10 @@
 import bpy
 import numpy as np
-from mathutils import Matrix
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+from pyblend.find import find_all_meshes, scene_meshes
+from pyblend.mesh import concat_mesh_arrays
+from pyblend.transform import get_vertices, obj_bbox, batch_project
 
 
 def get_K_intr_from_blender(camera: bpy.types.Object = None, width=None, height=None):
@@ -72,3 +76,305 @@ def get_camera_para(camera=None):
         "extrinsic": np.array(T),
     }
     return meta
+
+
+def look_at_poses(eyes, targets=(0, 0, 0), up=(0, 0, 1)):
+    """
+    Camera-to-world matrices of cameras at eyes pointing at targets, like `look_at`
+    (the camera looks along -Z and its Y axis is as close to up as possible).
+
+    Args:
+        eyes (np.ndarray): (N, 3) camera locations.
+        targets (np.ndarray, optional): (N, 3) or (3,) points to look at. Defaults to the origin.
+        up (tuple, optional): world up direction. Defaults to (0, 0, 1).
+
+    Returns:
+        np.ndarray: (N, 4, 4) camera-to-world matrices.
+    """
+    eyes = np.atleast_2d(np.asarray(eyes, dtype=np.float64))
+    targets = np.broadcast_to(np.asarray(targets, dtype=np.float64), eyes.shape)
+    up = np.asarray(up, dtype=np.float64)
+    z = eyes - targets
+    z /= np.linalg.norm(z, axis=1, keepdims=True)
+    x = np.cross(up, z)
+    degenerate = np.linalg.norm(x, axis=1) < 1e-8  # looking along up
+    x[degenerate] = np.cross(np.roll(up, 1), z[degenerate])
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    y = np.cross(z, x)
+    poses = np.tile(np.eye(4), (len(eyes), 1, 1))
+    poses[:, :3, 0] = x
+    poses[:, :3, 1] = y
+    poses[:, :3, 2] = z
+    poses[:, :3, 3] = eyes
+    return poses
+
+
+def get_K_intr_batch(
+    lens,
+    width,
+    height,
+    sensor_width=36.0,
+    sensor_height=24.0,
+    sensor_fit="AUTO",
+    shift_x=0.0,
+    shift_y=0.0,
+    pixel_aspect=1.0,
+):
+    """
+    Intrinsic matrices following Blender's sensor fit and lens shift conventions.
+    Every numeric argument may be a scalar or an (N,) array.
+    Reference: https://github.com/DLR-RM/BlenderProc/blob/main/blenderproc/python/camera/CameraUtility.py
+
+    Args:
+        lens (float or np.ndarray): focal length in mm.
+        width (int): image width in pixels.
+        height (int): image height in pixels.
+        sensor_width (float, optional): sensor width in mm. Defaults to 36.
+        sensor_height (float, optional): sensor height in mm. Defaults to 24.
+        sensor_fit (str, optional): "AUTO", "HORIZONTAL" or "VERTICAL". Defaults to "AUTO".
+        shift_x (float or np.ndarray, optional): horizontal lens shift. Defaults to 0.
+        shift_y (float or np.ndarray, optional): vertical lens shift. Defaults to 0.
+        pixel_aspect (float, optional): pixel_aspect_y / pixel_aspect_x. Defaults to 1.
+
+    Returns:
+        np.ndarray: (N, 3, 3) intrinsic matrices.
+    """
+    lens, sensor_width, sensor_height, shift_x, shift_y = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in (lens, sensor_width, sensor_height, shift_x, shift_y)]
+    )
+    sensor_size = sensor_height if sensor_fit == "VERTICAL" else sensor_width
+    if sensor_fit == "AUTO":
+        sensor_fit = "HORIZONTAL" if width >= height * pixel_aspect else "VERTICAL"
+    view_fac = width if sensor_fit == "HORIZONTAL" else height * pixel_aspect
+    fx = lens / sensor_size * view_fac
+    K = np.zeros((len(lens), 3, 3), dtype=np.float32)
+    K[:, 0, 0] = fx
+    K[:, 1, 1] = fx / pixel_aspect
+    K[:, 0, 2] = width / 2.0 - shift_x * view_fac
+    K[:, 1, 2] = height / 2.0 + shift_y * view_fac / pixel_aspect
+    K[:, 2, 2] = 1.0
+    return K
+
+
+def get_RT_batch(poses):
+    """
+    World-to-cv extrinsic matrices of camera-to-world poses, as get_3x4_RT_matrix_from_blender.
+
+    Args:
+        poses (np.ndarray): (N, 4, 4) camera-to-world matrices (e.g. matrix_world or look_at_poses).
+
+    Returns:
+        np.ndarray: (N, 4, 4) extrinsic matrices.
+    """
+    poses = np.asarray(poses, dtype=np.float64).reshape(-1, 4, 4)
+    rotation = poses[:, :3, :3] / np.linalg.norm(poses[:, :3, :3], axis=1, keepdims=True)  # drop scale
+    R_world2bcam = rotation.transpose(0, 2, 1)
+    T_world2bcam = -np.einsum("nij,nj->ni", R_world2bcam, poses[:, :3, 3])
+    R_bcam2cv = np.diag([1.0, -1.0, -1.0])
+    RT = np.tile(np.eye(4), (len(poses), 1, 1))
+    RT[:, :3, :3] = R_bcam2cv @ R_world2bcam
+    RT[:, :3, 3] = T_world2bcam @ R_bcam2cv.T
+    return RT.astype(np.float32)
+
+
+def get_camera_para_batch(camera=None, eyes=None, targets=(0, 0, 0), poses=None):
+    """
+    Get the camera parameters of many poses at once, without moving the camera.
+    Lens, sensor and resolution are read from the camera data and the scene.
+
+    Args:
+        camera (bpy.types.Object, optional): camera object. Defaults to bpy.data.objects["Camera"].
+        eyes (np.ndarray, optional): (N, 3) camera locations looking at targets.
+        targets (np.ndarray, optional): (N, 3) or (3,) look-at points. Defaults to the origin.
+        poses (np.ndarray, optional): (N, 4, 4) camera-to-world matrices, used instead of eyes.
+
+    Returns:
+        dict: camera parameters, "intrinsic" (N, 3, 3), "extrinsic" (N, 4, 4) and "pose" (N, 4, 4).
+    """
+    if camera is None:
+        camera = bpy.data.objects["Camera"]
+    if poses is None:
+        poses = look_at_poses(eyes, targets)
+    poses = np.asarray(poses, dtype=np.float64).reshape(-1, 4, 4)
+    render = bpy.context.scene.render
+    scale = render.resolution_percentage / 100
+    K = get_K_intr_batch(
+        camera.data.lens,
+        render.resolution_x * scale,
+        render.resolution_y * scale,
+        camera.data.sensor_width,
+        camera.data.sensor_height,
+        camera.data.sensor_fit,
+        camera.data.shift_x,
+        camera.data.shift_y,
+        render.pixel_aspect_y / render.pixel_aspect_x,
+    )
+    meta = {
+        "intrinsic": np.repeat(K, len(poses), axis=0),
+        "extrinsic": get_RT_batch(poses),
+        "pose": poses,
+    }
+    return meta
+
+
+class ViewPlanner:
+    """
+    Sample candidate camera locations and keep the ones worth rendering.
+
+    Candidates are first scored with the projected obj_bbox corners of every object
+    (in-frame fraction and screen coverage), then the survivors are ray cast against
+    a BVH of the scene meshes to measure how much of every object is occluded.
+    The camera itself is never moved.
+
+    Args:
+        objects (List[bpy.types.Object]): objects that must be seen.
+        camera (bpy.types.Object, optional): camera object. Defaults to bpy.data.objects["Camera"].
+        min_in_frame (float, optional): fraction of the bbox corners of every object inside the image. Defaults to 1.
+        min_coverage (float, optional): screen fraction covered by the 2D bbox of every object. Defaults to 0.001.
+        min_visibility (float, optional): fraction of unoccluded rays to every object. Defaults to 0.3.
+        num_rays (int, optional): rays cast to each object, towards random vertices. Defaults to 16.
+        seed (int, optional): random seed. Defaults to None.
+
+    >>> planner = ViewPlanner(objects)
+    >>> eyes, scores = planner.plan(8, num_candidates=256, mode="hemisphere", radius=(6, 8))
+    >>> camera_para = render_views(camera, eyes, "tmp/out_####.png")
+    """
+
+    def __init__(
+        self,
+        objects,
+        camera=None,
+        min_in_frame=1.0,
+        min_coverage=0.001,
+        min_visibility=0.3,
+        num_rays=16,
+        seed=None,
+    ):
+        self.objects = list(objects)
+        self.camera = camera if camera is not None else bpy.data.objects["Camera"]
+        self.min_in_frame = min_in_frame
+        self.min_coverage = min_coverage
+        self.min_visibility = min_visibility
+        self.num_rays = num_rays
+        self.rng = np.random.default_rng(seed)
+        self.boxes = np.stack([obj_bbox(obj, mode="box") for obj in self.objects])  # (M, 8, 3)
+        self._bvh = None
+
+    def sample(self, num, mode="sphere", radius=1.0, target=(0, 0, 0)):
+        """
+        Sample candidate camera locations around target.
+
+        Args:
+            num (int): number of locations.
+            mode (str, optional): "sphere", "fibonacci" (evenly spread on the sphere) or "hemisphere" (z >= 0).
+                Defaults to "sphere".
+            radius (float or Tuple[float, float], optional): distance to target, or a range to sample from.
+                Defaults to 1.
+
+        Returns:
+            np.ndarray: (num, 3) locations.
+        """
+        if mode == "fibonacci":
+            z = 1 - (2 * np.arange(num) + 1) / num
+            theta = np.pi * (3 - np.sqrt(5)) * np.arange(num)
+            r = np.sqrt(1 - z**2)
+            directions = np.stack([r * np.cos(theta), r * np.sin(theta), z], axis=1)
+        elif mode in ("sphere", "hemisphere"):
+            directions = self.rng.normal(size=(num, 3))
+            directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+            if mode == "hemisphere":
+                directions[:, 2] = np.abs(directions[:, 2])
+        else:
+            raise ValueError(f"Unknown mode {mode}")
+        if np.ndim(radius) == 0:
+            distances = np.full(num, float(radius))
+        else:
+            distances = self.rng.uniform(radius[0], radius[1], num)
+        return np.asarray(target, dtype=np.float64) + directions * distances[:, None]
+
+    def _build_bvh(self):
+        """
+        One BVH over the triangles of all scene meshes, remembering which object each triangle belongs to.
+        """
+        scene = concat_mesh_arrays(list(scene_meshes()), ["positions", "triangles"])
+        positions = scene["positions"] if scene["positions"] is not None else np.zeros((0, 3))
+        triangles = scene["triangles"] if scene["triangles"] is not None else np.zeros((0, 3), dtype=np.int32)
+        self._bvh = BVHTree.FromPolygons(positions.tolist(), triangles.tolist())
+        self._owners = np.repeat(scene["names"], np.diff(scene["offsets"]["triangles"])).tolist()
+        self._ray_targets = []
+        for obj in self.objects:
+            meshes = find_all_meshes(obj)
+            points = np.concatenate([get_vertices(mesh, mode="world") for mesh in meshes])
+            choice = self.rng.choice(len(points), min(self.num_rays, len(points)), replace=False)
+            self._ray_targets.append((points[choice], set(mesh.name for mesh in meshes)))
+
+    def visibility(self, eye):
+        """
+        Fraction of the rays from eye to each object that are not blocked by other objects.
+
+        Returns:
+            np.ndarray: (M,) visibility of every object.
+        """
+        if self._bvh is None:
+            self._build_bvh()
+        eye = Vector(eye)
+        result = np.zeros(len(self.objects))
+        for i, (points, names) in enumerate(self._ray_targets):
+            visible = 0
+            for point in points:
+                direction = Vector(point) - eye
+                distance = direction.length
+                _, _, index, hit = self._bvh.ray_cast(eye, direction.normalized(), distance)
+                if index is None or self._owners[index] in names or hit >= distance - 1e-4:
+                    visible += 1
+            result[i] = visible / max(len(points), 1)
+        return result
+
+    def score(self, eyes, target=(0, 0, 0)):
+        """
+        Score candidate locations.
+
+        Args:
+            eyes (np.ndarray): (N, 3) camera locations.
+            target (tuple, optional): point the camera looks at. Defaults to (0, 0, 0).
+
+        Returns:
+            dict: "in_frame", "coverage" and "visibility", each (N, M), "valid" (N,) and
+                "score" (N,), the total visible screen coverage of the objects.
+        """
+        camera_para = get_camera_para_batch(self.camera, eyes, target)
+        render = bpy.context.scene.render
+        scale = render.resolution_percentage / 100
+        width, height = render.resolution_x * scale, render.resolution_y * scale
+        points2d, _, mask = batch_project(self.boxes, camera_para["extrinsic"], camera_para["intrinsic"], width, height)
+        in_frame = mask.mean(axis=2)
+        clipped = np.clip(np.nan_to_num(points2d, nan=0.0), 0, (width, height))
+        extent = clipped.max(axis=2) - clipped.min(axis=2)  # (N, M, 2)
+        coverage = extent[..., 0] * extent[..., 1] / (width * height)
+
+        valid = ((in_frame >= self.min_in_frame) & (coverage >= self.min_coverage)).all(axis=1)
+        visibility = np.zeros_like(coverage)
+        for i in np.flatnonzero(valid):  # ray cast the views that survive the cheap tests only
+            visibility[i] = self.visibility(eyes[i])
+        valid &= (visibility >= self.min_visibility).all(axis=1)
+        return {
+            "in_frame": in_frame,
+            "coverage": coverage,
+            "visibility": visibility,
+            "valid": valid,
+            "score": np.where(valid, (coverage * visibility).sum(axis=1), -np.inf),
+        }
+
+    def plan(self, k, num_candidates=256, mode="sphere", radius=1.0, target=(0, 0, 0)):
+        """
+        Sample num_candidates locations and return the k best valid ones.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (K, 3) locations and their (K,) scores, best first.
+                K < k if not enough candidates meet the constraints.
+        """
+        eyes = self.sample(num_candidates, mode, radius, target)
+        scores = self.score(eyes, target)
+        order = np.argsort(-scores["score"], kind="stable")[:k]
+        order = order[scores["valid"][order]]
+        return eyes[order], scores["score"][order]
@@ -0,0 +1,106 @@
+"""
+Idempotent compositor setup from a declarative spec.
+
+Every call of enable_depth_render / enable_normal_render / enable_segmentation_render
+adds a new set of nodes, so calling them once per scene grows the compositor tree
+without bound. build_compositor instead names the nodes of each pass
+`pyblend.{pass}.{i}` and remembers a hash of the options they were built with:
+unchanged passes are reused, changed passes are rebuilt and passes missing from
+the spec are removed.
+
+>>> outputs = build_compositor({
+...     "depth": {"base_path": "tmp/out", "reverse": True},
+...     "normal": {"base_path": "tmp/out"},
+...     "segmentation": {"base_path": "tmp/out", "max_value": 10, "mode": "index"},
+... })
+>>> outputs["depth"]  # [exr_output_node, png_output_node]
+"""
+import bpy
+import json
+import hashlib
+from pyblend.find import find_all_pass_index
+from pyblend.render import enable_depth_render, enable_normal_render, enable_segmentation_render, save_palette
+
+# options that only retarget the File Output nodes and never trigger a rebuild
+OUTPUT_OPTIONS = ("base_path", "path")
+DEFAULT_PATHS = {"depth": "depth_", "normal": "normal_", "segmentation": "seg_"}
+# nodes shared by all passes, never owned by one of them
+SHARED_NODES = ("CompositorNodeRLayers", "CompositorNodeComposite")
+
+_BUILDERS = {
+    "depth": lambda options: enable_depth_render(reverse=options.get("reverse", False)),
+    "normal": lambda options: enable_normal_render(),
+    "segmentation": lambda options: enable_segmentation_render(
+        options.get("base_path", "output"), max_value=options.get("max_value"), mode=options.get("mode", "rainbow")
+    ),
+}
+
+
+def _options_hash(options):
+    structural = {k: v for k, v in options.items() if k not in OUTPUT_OPTIONS}
+    return hashlib.md5(json.dumps(structural, sort_keys=True).encode()).hexdigest()
+
+
+def _pass_nodes(nodes, name):
+    return [node for node in nodes if node.name.startswith(f"pyblend.{name}.")]
+
+
+def remove_pass(name):
+    """
+    Remove all compositor nodes of the given pass.
+    """
+    nodes = bpy.context.scene.node_tree.nodes
+    for node in _pass_nodes(nodes, name):
+        nodes.remove(node)
+    state = bpy.context.scene.get("pyblend_compositor")
+    if state is not None and name in state:
+        del state[name]
+
+
+def build_compositor(spec):
+    """
+    Make the compositor match spec, reusing the nodes of passes whose options did not change.
+
+    Args:
+        spec (dict): pass name ("depth", "normal" or "segmentation") -> options. "base_path" and
+            "path" (file slot prefix) only retarget the outputs; other options are forwarded
+            to the enable_*_render function of the pass. Set "max_value" for segmentation,
+            otherwise it is computed once when the pass is built.
+
+    Returns:
+        dict: pass name -> list of its File Output nodes, in the order enable_*_render returns them.
+    """
+    scene = bpy.context.scene
+    scene.use_nodes = True
+    nodes = scene.node_tree.nodes
+    state = scene["pyblend_compositor"].to_dict() if "pyblend_compositor" in scene else {}
+
+    for name in list(state):
+        if name not in spec:
+            for node in _pass_nodes(nodes, name):
+                nodes.remove(node)
+            del state[name]
+
+    outputs = {}
+    for name, options in spec.items():
+        if name not in _BUILDERS:
+            raise ValueError(f"Unknown pass {name}")
+        digest = _options_hash(options)
+        existing = _pass_nodes(nodes, name)
+        if state.get(name) != digest or not existing:
+            for node in existing:
+                nodes.remove(node)
+            before = set(node.name for node in nodes)
+            _BUILDERS[name](options)
+            created = [node for node in nodes if node.name not in before and node.bl_idname not in SHARED_NODES]
+            for i, node in enumerate(created):
+                node.name = f"pyblend.{name}.{i}"
+            state[name] = digest
+        outputs[name] = [node for node in _pass_nodes(nodes, name) if node.bl_idname == "CompositorNodeOutputFile"]
+        for node in outputs[name]:
+            node.base_path = options.get("base_path", "output")
+            node.file_slots[0].path = options.get("path", DEFAULT_PATHS[name])
+        if name == "segmentation" and options.get("mode") == "index":
+            save_palette(options.get("base_path", "output"), options.get("max_value") or max(find_all_pass_index()))
+    scene["pyblend_compositor"] = state
+    return outputs
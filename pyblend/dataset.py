@@ -0,0 +1,170 @@
+"""
+Sharded storage for rendered frames. This module does not import bpy.
+
+Each frame is a dict of arrays (e.g. rgb, depth, normal, index, intrinsic and
+extrinsic). Frames are appended to tar shards `{prefix}-00000.tar`, ... with one
+uncompressed .npy member per array, so thousands of frames share one file. The
+index `{prefix}.index.jsonl` records where every array starts, which gives random
+access (optionally memory-mapped) without scanning the shards.
+
+>>> with ShardWriter("tmp/dataset", prefix="worker0") as writer:
+...     writer.write("scene_0000_view_00", {"rgb": rgb, "depth": depth, **camera_para})
+>>> reader = ShardReader("tmp/dataset")
+>>> frame = reader["scene_0000_view_00"]
+"""
+import io
+import os
+import json
+import glob
+import tarfile
+import numpy as np
+
+_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+
+class ShardWriter:
+    """
+    Append frames to tar shards, starting a new shard after max_count frames or max_bytes bytes.
+
+    Args:
+        root (str): output directory.
+        prefix (str, optional): shard and index file prefix, use one per writer process. Defaults to "shard".
+        max_count (int, optional): frames per shard. Defaults to 1000.
+        max_bytes (int, optional): bytes per shard. Defaults to 1 GB.
+    """
+
+    def __init__(self, root, prefix="shard", max_count=1000, max_bytes=1 << 30):
+        self.root = root
+        self.prefix = prefix
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.index = open(os.path.join(root, f"{prefix}.index.jsonl"), "a")
+        self.shard_idx = len(glob.glob(os.path.join(root, f"{prefix}-*.tar")))
+        self.tar = None
+        self.count = 0
+
+    def _open_shard(self):
+        self.close_shard()
+        self.shard = f"{self.prefix}-{self.shard_idx:05d}.tar"
+        self.tar = tarfile.open(os.path.join(self.root, self.shard), "w", format=tarfile.PAX_FORMAT)
+        self.shard_idx += 1
+        self.count = 0
+
+    def close_shard(self):
+        if self.tar is not None:
+            self.tar.close()
+            self.tar = None
+        self.index.flush()
+
+    def write(self, key, arrays, meta=None):
+        """
+        Append one frame.
+
+        Args:
+            key (str): unique frame key.
+            arrays (dict): name -> np.ndarray.
+            meta (dict, optional): JSON-serializable metadata stored in the index.
+        """
+        if self.tar is None or self.count >= self.max_count or self.tar.offset >= self.max_bytes:
+            self._open_shard()
+        entry = {"key": key, "shard": self.shard, "arrays": {}}
+        if meta is not None:
+            entry["meta"] = meta
+        for name, array in arrays.items():
+            buffer = io.BytesIO()
+            np.save(buffer, np.asarray(array), allow_pickle=False)
+            info = tarfile.TarInfo(f"{key}.{name}.npy")
+            info.size = buffer.tell()
+            buffer.seek(0)
+            header = info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors)
+            entry["arrays"][name] = [self.tar.offset + len(header), info.size]
+            self.tar.addfile(info, buffer)
+        self.index.write(json.dumps(entry) + "\n")
+        self.count += 1
+
+    def close(self):
+        self.close_shard()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardReader:
+    """
+    Random access to the frames written by one or more ShardWriters into root.
+
+    Args:
+        root (str): dataset directory.
+        mmap (bool, optional): memory-map arrays instead of reading them. Defaults to False.
+    """
+
+    def __init__(self, root, mmap=False):
+        self.root = root
+        self.mmap = mmap
+        self.entries = {}
+        for path in sorted(glob.glob(os.path.join(root, "*.index.jsonl"))):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.entries[entry["key"]] = entry
+        self._files = {}
+
+    def keys(self):
+        return list(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def meta(self, key):
+        return self.entries[key].get("meta")
+
+    def _file(self, shard):
+        if shard not in self._files:
+            self._files[shard] = open(os.path.join(self.root, shard), "rb")
+        return self._files[shard]
+
+    def _read(self, shard, offset, size):
+        f = self._file(shard)
+        f.seek(offset)
+        if self.mmap:
+            version = np.lib.format.read_magic(f)
+            if version in _HEADER_READERS:
+                shape, fortran_order, dtype = _HEADER_READERS[version](f)
+                order = "F" if fortran_order else "C"
+                return np.memmap(f, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order=order)
+            f.seek(offset)
+        return np.load(io.BytesIO(f.read(size)), allow_pickle=False)
+
+    def get(self, key, names=None):
+        """
+        Load the arrays of one frame.
+
+        Args:
+            key (str): frame key.
+            names (List[str], optional): arrays to load. Defaults to all of them.
+
+        Returns:
+            dict: name -> np.ndarray.
+        """
+        entry = self.entries[key]
+        names = entry["arrays"].keys() if names is None else names
+        return {name: self._read(entry["shard"], *entry["arrays"][name]) for name in names}
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
@@ -0,0 +1,309 @@
+"""
+Shard a list of render jobs across several headless Blender workers.
+
+This module does not import bpy; run it with any Python interpreter. Each
+shard is rendered by one `pyblend/worker.py` process, failed jobs are retried
+in a fresh process (a crash is blamed on the job being rendered, not on the
+jobs queued behind it) and finished jobs are merged into one output directory:
+>>> python -m pyblend.farm --blender {path/to/blender} --manifest jobs.jsonl --output tmp/farm --num_workers 4
+
+The manifest is a JSON list or a JSON-lines file of job specs as accepted by
+pyblend.worker.RenderWorker. Its "output" entries are ignored: job `id` is
+rendered to `{output}/{id}`.
+"""
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+RECORD_PREFIX = "@pyblend "  # keep in sync with pyblend.worker, which can't be imported without bpy
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+
+def load_manifest(path):
+    """
+    Load jobs from a JSON list or a JSON-lines file. Jobs without an id get their line number.
+    """
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        jobs = json.loads(text)
+    else:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for i, job in enumerate(jobs):
+        job.setdefault("id", f"{i:06d}")
+    check_job_ids(jobs)
+    return jobs
+
+
+def check_job_ids(jobs):
+    """
+    Raise a ValueError if several jobs share an id, their outputs and records would collide.
+    """
+    seen, duplicates = set(), set()
+    for job in jobs:
+        if job["id"] in seen:
+            duplicates.add(job["id"])
+        seen.add(job["id"])
+    if duplicates:
+        raise ValueError(f"Duplicate job ids: {sorted(duplicates)}")
+
+
+def _parse_cpulist(text):
+    """
+    Parse a Linux cpulist such as "0-3,8-11".
+    """
+    cpus = []
+    for part in text.strip().split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def available_cpus():
+    """
+    CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes():
+    """
+    Available CPUs grouped by NUMA node, a single group if the topology is unknown.
+    """
+    allowed = set(available_cpus())
+    nodes = []
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        with open(path) as f:
+            cpus = [cpu for cpu in _parse_cpulist(f.read()) if cpu in allowed]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(allowed)]
+
+
+def partition_cpus(num_workers):
+    """
+    Split the available CPUs between num_workers processes without oversubscription.
+    Workers are spread round-robin over the NUMA nodes and the CPUs of every node are
+    split evenly between its workers, so no worker straddles two nodes unless there
+    are more nodes than workers. With more workers than CPUs on a node every worker
+    gets a single CPU and the CPUs are reused round-robin.
+
+    Returns:
+        List[List[int]]: CPU ids of every worker.
+    """
+    nodes = numa_nodes()
+    if num_workers < len(nodes):  # fewer workers than nodes: merge nodes
+        return [sum(nodes[i::num_workers], []) for i in range(num_workers)]
+    workers_per_node = [len(range(i, num_workers, len(nodes))) for i in range(len(nodes))]
+    groups = [[] for _ in range(num_workers)]
+    for node_idx, (cpus, count) in enumerate(zip(nodes, workers_per_node)):
+        for j in range(count):
+            if count > len(cpus):  # more workers than CPUs: one CPU each, reused round-robin
+                share = [cpus[j % len(cpus)]]
+            else:
+                share = cpus[j * len(cpus) // count : (j + 1) * len(cpus) // count]
+            groups[node_idx + j * len(nodes)] = share
+    return groups
+
+
+def partition(jobs, num_shards):
+    """
+    Split jobs into num_shards round-robin shards.
+    """
+    return [jobs[i::num_shards] for i in range(num_shards)]
+
+
+class RenderFarm:
+    """
+    Render jobs with num_workers Blender subprocesses running in parallel.
+
+    Args:
+        blender (str, optional): path to the Blender executable. Defaults to "blender".
+        num_workers (int, optional): number of Blender processes. Defaults to 2.
+        threads (int, optional): render threads per worker. Defaults to the size of its CPU share.
+        pin (bool, optional): pin every worker to its share of CPUs from partition_cpus (Linux only),
+            keeping its threads and memory on one NUMA node. Defaults to False.
+        max_retries (int, optional): how many times a failed job is resubmitted. Defaults to 2.
+        worker_args (List[str], optional): extra arguments passed to pyblend/worker.py.
+        verbose (bool, optional): print progress. Defaults to True.
+
+    >>> farm = RenderFarm("blender_app", num_workers=4)
+    >>> records = farm.run(load_manifest("jobs.jsonl"), "tmp/farm")
+    """
+
+    def __init__(
+        self, blender="blender", num_workers=2, threads=None, max_retries=2, worker_args=(), verbose=True, pin=False
+    ):
+        self.blender = blender
+        self.num_workers = num_workers
+        self.cpus = partition_cpus(num_workers)
+        self.threads = threads
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self.max_retries = max_retries
+        self.worker_args = list(worker_args)
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._done = 0
+        self._failed = 0
+        self._total = 0
+
+    def _command(self, cpus):
+        return [
+            self.blender,
+            "-b",
+            "-noaudio",
+            "-t",
+            str(self.threads if self.threads is not None else len(cpus)),
+            "-P",
+            WORKER_SCRIPT,
+            "--",
+            *self.worker_args,
+        ]
+
+    def _progress(self, record):
+        with self._lock:
+            if record["status"] == "ok":
+                self._done += 1
+            else:
+                self._failed += 1
+            if self.verbose:
+                print(f"[farm] {self._done}/{self._total} done, {self._failed} failed ({record['id']})")
+
+    def _run_once(self, jobs, staging, cpus):
+        """
+        Feed jobs to a fresh worker and collect its records until it exits.
+        """
+        preexec_fn = (lambda: os.sched_setaffinity(0, cpus)) if self.pin else None
+        proc = subprocess.Popen(
+            self._command(cpus),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            preexec_fn=preexec_fn,
+        )
+
+        def feed():
+            try:
+                for job in jobs:
+                    job = dict(job, output=os.path.join(staging, job["id"]))
+                    proc.stdin.write(json.dumps(job) + "\n")
+                proc.stdin.close()
+            except BrokenPipeError:  # the worker died, its remaining jobs will be retried
+                pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        records = {}
+        for line in proc.stdout:
+            if line.startswith(RECORD_PREFIX):
+                record = json.loads(line[len(RECORD_PREFIX) :])
+                records[record["id"]] = record
+                if record["status"] == "ok":
+                    self._progress(record)
+        proc.wait()
+        feeder.join()
+        return records, proc.returncode
+
+    def _run_shard(self, jobs, staging, cpus):
+        """
+        Render a shard, restarting the worker until every job succeeded or ran out of retries.
+        When the worker dies, only the job in flight (the first one fed without a record) is
+        blamed; the jobs behind it are resubmitted first and failed jobs go to the back of the
+        queue, so a job that always crashes Blender can't take the rest of the shard down.
+        """
+        pending = list(jobs)
+        retries = {job["id"]: 0 for job in jobs}
+        results = {}
+        while pending:
+            for job in pending:
+                shutil.rmtree(os.path.join(staging, job["id"]), ignore_errors=True)
+            records, returncode = self._run_once(pending, staging, cpus)
+            unfinished, failed, crashed = [], [], False
+            for job in pending:
+                record = records.get(job["id"])
+                if record is None and not crashed:
+                    crashed = True
+                    record = {"id": job["id"], "status": "error", "error": f"worker exited with code {returncode}"}
+                if record is None:  # never reached by the worker
+                    unfinished.append(job)
+                    continue
+                results[job["id"]] = record
+                if record["status"] == "ok":
+                    continue
+                if retries[job["id"]] < self.max_retries:
+                    retries[job["id"]] += 1
+                    failed.append(job)
+                else:
+                    self._progress(record)
+            pending = unfinished + failed
+        return [results[job["id"]] for job in jobs]
+
+    def _merge(self, record, staging, output):
+        src = os.path.join(staging, record["id"])
+        dst = os.path.join(output, record["id"])
+        if os.path.exists(dst):
+            shutil.rmtree(dst)
+        shutil.move(src, dst)
+        for frame in record.get("frames", []):
+            for key, value in frame.items():
+                if isinstance(value, str) and value.startswith(src):
+                    frame[key] = dst + value[len(src) :]
+
+    def run(self, jobs, output):
+        """
+        Render all jobs and merge their outputs into output/{job id}.
+
+        Args:
+            jobs (List[dict]): job specs, each with a unique "id".
+            output (str): output directory.
+
+        Returns:
+            List[dict]: one completion record per job. Records are also written to output/records.jsonl.
+        """
+        check_job_ids(jobs)
+        output = os.path.abspath(output)
+        staging = os.path.join(output, ".staging")
+        os.makedirs(staging, exist_ok=True)
+        self._done = self._failed = 0
+        self._total = len(jobs)
+
+        shards = [(shard, cpus) for shard, cpus in zip(partition(jobs, self.num_workers), self.cpus) if shard]
+        with ThreadPoolExecutor(max_workers=len(shards) or 1) as pool:
+            results = list(pool.map(lambda shard: self._run_shard(shard[0], staging, shard[1]), shards))
+
+        records = [record for shard_records in results for record in shard_records]
+        for record in records:
+            if record["status"] == "ok":
+                self._merge(record, staging, output)
+        shutil.rmtree(staging, ignore_errors=True)
+        with open(os.path.join(output, "records.jsonl"), "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blender", type=str, default="blender")
+    parser.add_argument("--manifest", type=str, required=True)
+    parser.add_argument("--output", type=str, default="tmp/farm")
+    parser.add_argument("--num_workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max_retries", type=int, default=2)
+    parser.add_argument("--pin", action="store_true", help="pin workers to NUMA-local CPU shares")
+    args, worker_args = parser.parse_known_args()
+    farm = RenderFarm(args.blender, args.num_workers, args.threads, args.max_retries, worker_args, pin=args.pin)
+    records = farm.run(load_manifest(args.manifest), args.output)
+    sys.exit(0 if all(record["status"] == "ok" for record in records) else 1)
@@ -63,9 +63,7 @@ def find_all_objects(obj: bpy.types.Object):
 
 
 def find_all_pass_index():
-    indexes = []
-    for obj in bpy.context.scene.objects.values():
-        idx = obj.pass_index
-        if idx not in indexes:
-            indexes.append(idx)
-    return indexes
+    """
+    List the distinct pass_index values of the scene objects, in order of first appearance.
+    """
+    return list(dict.fromkeys(obj.pass_index for obj in bpy.context.scene.objects.values()))
@@ -67,37 +67,58 @@ def set_voronoi_texture(mat_or_obj):
     return mat
 
 
-def random_transparent_mat(nodes, color=None):
+def random_transparent_mat(nodes, color=None, transmission=None):
     prin_node = nodes["Principled BSDF"]
     if color is None:
         prin_node.inputs[0].default_value = np.random.uniform(0.3, 0.9, 4)  # Base Color
     else:
         prin_node.inputs[0].default_value = color
-    for i in range(4, 13):
+    for i in range(4, 14):
         prin_node.inputs[i].default_value = 0
     prin_node.inputs[14].default_value = 1.45
     prin_node.inputs[15].default_value = 0  # Roughness
-    prin_node.inputs[17].default_value = 0.9 + rand() * 0.1  # Transmission
+    if transmission is None:
+        transmission = 0.9 + rand() * 0.1
+    prin_node.inputs[17].default_value = transmission  # Transmission
 
 
-def random_metallic_mat(nodes, color=None):
+def random_metallic_mat(nodes, color=None, values=None):
     prin_node = nodes["Principled BSDF"]
     if color is None:
         prin_node.inputs[0].default_value = np.random.uniform(0.3, 0.9, 4)  # Base Color
     else:
         prin_node.inputs[0].default_value = color
-    for i in range(6, 16):
-        prin_node.inputs[i].default_value = rand() / 5
+    if values is None:
+        values = rand(10) / 5
+    # inputs written by random_transparent_mat only, so that earlier draws don't leak through
+    for i in (4, 5, 17):
+        prin_node.inputs[i].default_value = 0
+    for i, value in zip(range(6, 16), values):
+        prin_node.inputs[i].default_value = value
 
 
-def random_mat(mat, color=None):
+def random_mat(mat, color=None, kind=None, values=None):
+    """
+    Randomize a Principled BSDF material, either transparent or metallic.
+    Both kinds write the same inputs, so the result doesn't depend on earlier calls.
+
+    Args:
+        mat (bpy.types.Material): material, a new one is created if None.
+        color (tuple, optional): RGBA base color. Defaults to a random color.
+        kind (str, optional): "transparent" or "metallic". Defaults to a coin flip.
+        values (List[float], optional): pre-drawn parameters, the transmission for
+            "transparent" or the 10 metallic inputs for "metallic". Defaults to random values.
+    """
     if mat is None:
         mat = bpy.data.materials.new(name="Material")
         mat.use_nodes = True
     nodes = mat.node_tree.nodes
-    prob = rand()
-    if prob <= 0.5:
-        random_transparent_mat(nodes, color)
-    elif 0.5 < prob <= 1.0:
-        random_metallic_mat(nodes, color)
+    if kind is None:
+        kind = "transparent" if rand() <= 0.5 else "metallic"
+    if kind == "transparent":
+        random_transparent_mat(nodes, color, values[0] if values is not None else None)
+    elif kind == "metallic":
+        random_metallic_mat(nodes, color, values)
+    else:
+        raise ValueError(f"Unknown material kind {kind}")
     return mat
@@ -1,3 +1,31 @@
+import bpy
+import numpy as np
+
+MESH_ATTRIBUTES = (
+    "positions",
+    "triangles",
+    "triangle_loops",
+    "loop_vertices",
+    "normals",
+    "vertex_normals",
+    "uvs",
+    "colors",
+)
+# element every attribute is stored per, "colors" depend on the domain of the color attribute
+ATTRIBUTE_DOMAINS = {
+    "positions": "vertices",
+    "triangles": "triangles",
+    "triangle_loops": "triangles",
+    "loop_vertices": "loops",
+    "normals": "loops",
+    "vertex_normals": "vertices",
+    "uvs": "loops",
+}
+PC2_HEADER = np.dtype(
+    [("magic", "S12"), ("version", "<i4"), ("points", "<i4"), ("start", "<f4"), ("rate", "<f4"), ("samples", "<i4")]
+)
+
+
 def get_meshes(obj):
     """
     Get all the meshes of an object recursively.
@@ -8,3 +36,242 @@ def get_meshes(obj):
     for child in obj.children:
         meshes.extend(get_meshes(child))
     return meshes
+
+
+def _foreach_get(collection, prop, count, width, dtype):
+    buffer = np.empty(count * width, dtype=dtype)
+    collection.foreach_get(prop, buffer)
+    return buffer.reshape(count, width) if width > 1 else buffer
+
+
+def _corner_normals(mesh):
+    if hasattr(mesh, "corner_normals"):  # Blender >= 4.1
+        return _foreach_get(mesh.corner_normals, "vector", len(mesh.loops), 3, np.float32)
+    mesh.calc_normals_split()
+    return _foreach_get(mesh.loops, "normal", len(mesh.loops), 3, np.float32)
+
+
+def _color_domain(mesh):
+    """
+    Domain of the active color attribute, "vertices", "loops" or None without colors.
+    """
+    attributes = getattr(mesh, "color_attributes", None)
+    if attributes is not None and attributes.active_color is not None:
+        return "vertices" if attributes.active_color.domain == "POINT" else "loops"
+    if hasattr(mesh, "vertex_colors") and mesh.vertex_colors.active is not None:
+        return "loops"
+    return None
+
+
+def _colors(mesh):
+    """
+    Active color attribute, per corner or per vertex depending on its domain.
+    """
+    attributes = getattr(mesh, "color_attributes", None)
+    if attributes is not None and attributes.active_color is not None:
+        color = attributes.active_color
+        count = len(mesh.vertices) if color.domain == "POINT" else len(mesh.loops)
+        return _foreach_get(color.data, "color", count, 4, np.float32)
+    if hasattr(mesh, "vertex_colors") and mesh.vertex_colors.active is not None:  # Blender < 3.2
+        return _foreach_get(mesh.vertex_colors.active.data, "color", len(mesh.loops), 4, np.float32)
+    return None
+
+
+def mesh_arrays(obj_or_mesh, attributes=("positions", "triangles"), space="obj"):
+    """
+    Read mesh data in bulk with foreach_get into float32 / int32 arrays.
+
+    Args:
+        obj_or_mesh (bpy.types.Object or bpy.types.Mesh): The object or mesh.
+        attributes (List[str], optional): any of MESH_ATTRIBUTES. Defaults to ("positions", "triangles").
+            "positions" (V, 3) vertex coordinates, "triangles" (T, 3) vertex indices of the loop
+            triangles (quads and n-gons included), "triangle_loops" (T, 3) their loop (corner)
+            indices, "loop_vertices" (L,) vertex index of every corner, "normals" (L, 3) corner
+            normals, "vertex_normals" (V, 3), "uvs" (L, 2) active UV map and "colors" (L, 4) or
+            (V, 4) active color attribute. Missing UVs or colors are None.
+        space (str, optional): "obj" or "world". Defaults to "obj".
+
+    Returns:
+        dict: attribute name -> array.
+    """
+    is_obj = isinstance(obj_or_mesh, bpy.types.Object)
+    mesh = obj_or_mesh.data if is_obj else obj_or_mesh
+    assert mesh is not None, "mesh is None"
+    if space == "world" and not is_obj:
+        raise ValueError("world space needs an object")
+    arrays = {}
+    for name in attributes:
+        if name == "positions":
+            arrays[name] = _foreach_get(mesh.vertices, "co", len(mesh.vertices), 3, np.float32)
+        elif name in ("triangles", "triangle_loops"):
+            mesh.calc_loop_triangles()
+            prop = "vertices" if name == "triangles" else "loops"
+            arrays[name] = _foreach_get(mesh.loop_triangles, prop, len(mesh.loop_triangles), 3, np.int32)
+        elif name == "loop_vertices":
+            arrays[name] = _foreach_get(mesh.loops, "vertex_index", len(mesh.loops), 1, np.int32)
+        elif name == "normals":
+            arrays[name] = _corner_normals(mesh)
+        elif name == "vertex_normals":
+            arrays[name] = _foreach_get(mesh.vertices, "normal", len(mesh.vertices), 3, np.float32)
+        elif name == "uvs":
+            layer = mesh.uv_layers.active
+            arrays[name] = None if layer is None else _foreach_get(layer.data, "uv", len(mesh.loops), 2, np.float32)
+        elif name == "colors":
+            arrays[name] = _colors(mesh)
+        else:
+            raise ValueError(f"Unknown attribute {name}")
+
+    if space == "world":
+        matrix = np.array(obj_or_mesh.matrix_world, dtype=np.float32)
+        normal_matrix = np.linalg.inv(matrix[:3, :3]).T
+        if "positions" in arrays:
+            arrays["positions"] = arrays["positions"] @ matrix[:3, :3].T + matrix[:3, 3]
+        for name in ("normals", "vertex_normals"):
+            if name in arrays:
+                normals = arrays[name] @ normal_matrix.T
+                arrays[name] = normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    return arrays
+
+
+def concat_mesh_arrays(objs, attributes=("positions", "triangles"), space="world"):
+    """
+    Read many meshes with mesh_arrays and concatenate them into one set of arrays.
+    Index arrays are shifted so they point into the concatenated arrays.
+
+    Args:
+        objs (List[bpy.types.Object]): mesh objects.
+        attributes (List[str], optional): see mesh_arrays. Defaults to ("positions", "triangles").
+        space (str, optional): "obj" or "world". Defaults to "world".
+
+    Returns:
+        dict: attribute name -> concatenated array, plus "names" and "offsets": "vertices",
+            "loops" and/or "triangles" (only those the requested attributes are stored per)
+            -> (K + 1,) int64 start of every object, e.g. the triangles of object k are
+            triangles[offsets["triangles"][k] : offsets["triangles"][k + 1]]. UVs or colors
+            missing on some objects are filled with zeros, None if missing on all of them.
+
+    Raises:
+        ValueError: if "colors" are requested and the objects mix point and corner colors.
+    """
+    per_obj = [mesh_arrays(obj, attributes, space) for obj in objs]
+    shift = {"triangles": "vertices", "loop_vertices": "vertices", "triangle_loops": "loops"}
+    widths = {"uvs": 2, "colors": 4}
+    domains = {name: ATTRIBUTE_DOMAINS[name] for name in attributes if name != "colors"}
+    if "colors" in attributes:
+        color_domains = {_color_domain(obj.data) for obj in objs} - {None}
+        if len(color_domains) > 1:
+            raise ValueError("Can't concatenate point and corner colors, use one color domain for all objects")
+        domains["colors"] = color_domains.pop() if color_domains else "loops"
+
+    needed = set(domains.values()) | {shift[name] for name in attributes if name in shift}
+    collections = {"vertices": "vertices", "loops": "loops", "triangles": "loop_triangles"}
+    counts = {key: [len(getattr(obj.data, collections[key])) for obj in objs] for key in needed}
+    offsets = {key: np.concatenate([[0], np.cumsum(value)]).astype(np.int64) for key, value in counts.items()}
+
+    result = {"names": [obj.name for obj in objs], "offsets": offsets}
+    for name in attributes:
+        if all(arrays[name] is None for arrays in per_obj):
+            result[name] = None
+            continue
+        chunks = []
+        for k, arrays in enumerate(per_obj):
+            array = arrays[name]
+            if array is None:
+                array = np.zeros((counts[domains[name]][k], widths[name]), dtype=np.float32)
+            if name in shift:
+                array = array + np.int32(offsets[shift[name]][k])
+            chunks.append(array)
+        result[name] = np.concatenate(chunks)
+    return result
+
+
+def write_pc2(path, sequence, frame_start=1, sample_rate=1.0, chunk=256):
+    """
+    Write a vertex sequence to a PC2 point cache, streaming chunk frames at a time so
+    memory-mapped sequences are never fully loaded.
+
+    Args:
+        path (str): output .pc2 path.
+        sequence (np.ndarray): (T, N, 3) vertex positions, e.g. np.load(path, mmap_mode="r").
+        frame_start (float, optional): frame of the first sample. Defaults to 1.
+        sample_rate (float, optional): frames between samples. Defaults to 1.
+        chunk (int, optional): frames converted per write. Defaults to 256.
+    """
+    num_frames, num_points = sequence.shape[:2]
+    header = np.zeros(1, dtype=PC2_HEADER)
+    header[0] = (b"POINTCACHE2", 1, num_points, frame_start, sample_rate, num_frames)
+    with open(path, "wb") as f:
+        header.tofile(f)
+        for t in range(0, num_frames, chunk):
+            np.ascontiguousarray(sequence[t : t + chunk], dtype="<f4").tofile(f)
+
+
+def bake_mesh_cache(obj, sequence, path, frame_start=1):
+    """
+    Bake a (T, N, 3) object-space vertex sequence into a PC2 file read by a Mesh Cache
+    modifier. Blender then streams the positions of every frame from disk during
+    playback and rendering, without Python involvement.
+
+    Args:
+        obj (bpy.types.Object): mesh object with N vertices.
+        sequence (np.ndarray): (T, N, 3) vertex positions, may be memory-mapped.
+        path (str): .pc2 file to write.
+        frame_start (int, optional): scene frame of the first sample. Defaults to 1.
+
+    Returns:
+        bpy.types.Modifier: the Mesh Cache modifier.
+    """
+    assert sequence.shape[1] == len(obj.data.vertices), "vertex count mismatch"
+    write_pc2(path, sequence, frame_start)
+    modifier = obj.modifiers.get("pyblend_cache") or obj.modifiers.new("pyblend_cache", "MESH_CACHE")
+    modifier.cache_format = "PC2"
+    modifier.filepath = bpy.path.relpath(path) if bpy.data.filepath else path
+    modifier.deform_mode = "OVERWRITE"
+    modifier.time_mode = "FRAME"
+    modifier.play_mode = "SCENE"
+    modifier.frame_start = frame_start
+    modifier.frame_scale = 1.0
+    return modifier
+
+
+def bake_shape_keys(obj, sequence, frame_start=1):
+    """
+    Bake a (T, N, 3) object-space vertex sequence into absolute shape keys, one per
+    frame, driven by a linear eval_time animation. Keys live in the .blend, so prefer
+    bake_mesh_cache for long sequences of big meshes. Baking again replaces the
+    frame keys and eval_time animation of the previous bake.
+
+    Args:
+        obj (bpy.types.Object): mesh object with N vertices.
+        sequence (np.ndarray): (T, N, 3) vertex positions, may be memory-mapped.
+        frame_start (int, optional): scene frame of the first sample. Defaults to 1.
+
+    Returns:
+        bpy.types.Key: the shape key datablock.
+    """
+    assert sequence.shape[1] == len(obj.data.vertices), "vertex count mismatch"
+    shape_keys = obj.data.shape_keys
+    if shape_keys is None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    else:  # drop the keys and eval_time animation of an earlier bake
+        for block in [block for block in shape_keys.key_blocks if block.name.startswith("frame_")]:
+            obj.shape_key_remove(block)
+        action = shape_keys.animation_data.action if shape_keys.animation_data is not None else None
+        fcurve = action.fcurves.find("eval_time") if action is not None else None
+        if fcurve is not None:
+            action.fcurves.remove(fcurve)
+    for t in range(len(sequence)):
+        key = obj.shape_key_add(name=f"frame_{t:05d}", from_mix=False)
+        key.data.foreach_set("co", np.ascontiguousarray(sequence[t], dtype=np.float32).reshape(-1))
+    shape_keys = obj.data.shape_keys
+    shape_keys.use_relative = False
+    frames = [block.frame for block in shape_keys.key_blocks if block.name.startswith("frame_")]
+    frame_end = frame_start + len(sequence) - 1
+    shape_keys.eval_time = frames[0]
+    shape_keys.keyframe_insert("eval_time", frame=frame_start)
+    shape_keys.eval_time = frames[-1]
+    shape_keys.keyframe_insert("eval_time", frame=frame_end)
+    for fcurve in shape_keys.animation_data.action.fcurves:
+        for point in fcurve.keyframe_points:
+            point.interpolation = "LINEAR"
+    return shape_keys
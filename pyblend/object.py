@@ -1,8 +1,13 @@
+import os
 import bpy
+import json
+import hashlib
+from collections import OrderedDict
 import numpy as np
 from mathutils import Matrix
 
 from pyblend.mesh import get_meshes
+from pyblend.find import find_all_objects
 from pyblend.transform import transform, center_vert_bbox, get_vertices
 
 
@@ -24,7 +29,102 @@ def create_monkey(location, rotation, scale, name=None) -> bpy.types.Object:
     return monkey
 
 
-def load_obj(obj_root, obj_name, center=True, join=False, smart_uv=False):
+class AssetCache:
+    """
+    On-disk cache of imported assets. Each entry is a .blend file keyed by the
+    hash of the source file and the import options, holding the imported (and
+    joined, centered, unwrapped) objects. Appending from a .blend is much faster
+    than running the obj/glb importers again. Least recently used entries are
+    deleted once the cache grows beyond max_size bytes.
+
+    >>> cache = AssetCache("tmp/asset_cache", max_size=10 * 2**30)
+    >>> obj = load_obj(path, "object", center=False, join=True, cache=cache)
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._hashes = {}  # (path, size, mtime) -> file hash
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, obj_root, **options):
+        """
+        Compute the cache key of obj_root imported with the given options.
+        """
+        stat = os.stat(obj_root)
+        signature = (os.path.abspath(obj_root), stat.st_size, stat.st_mtime_ns)
+        if signature not in self._hashes:
+            file_hash = hashlib.sha1()
+            with open(obj_root, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    file_hash.update(chunk)
+            self._hashes[signature] = file_hash.hexdigest()
+        options["blender"] = bpy.app.version_string
+        options = json.dumps(options, sort_keys=True)
+        return hashlib.sha1((self._hashes[signature] + options).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.blend")
+
+    def load(self, key):
+        """
+        Append the cached objects of key to the active collection.
+
+        Returns:
+            bpy.types.Object: the root object, or None on a cache miss.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            data_to.objects = data_from.objects
+        os.utime(path)  # mark as recently used
+        bpy.ops.object.select_all(action="DESELECT")
+        collection = bpy.context.view_layer.active_layer_collection.collection
+        for obj in data_to.objects:
+            collection.objects.link(obj)
+            obj.select_set(True)
+        return next(obj for obj in data_to.objects if obj.parent is None)
+
+    def save(self, key, obj):
+        """
+        Store obj and its children (with their meshes, materials and images) under key.
+        """
+        tmp_path = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.blend")
+        bpy.data.libraries.write(tmp_path, set(find_all_objects(obj)), path_remap="ABSOLUTE")
+        os.replace(tmp_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_size bytes.
+        """
+        if self.max_size is None:
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".blend") and not name.startswith("."):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries[:-1]:  # always keep the newest entry
+            if total <= self.max_size:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+
+def _name_obj(obj, obj_name):
+    obj.name = obj_name
+    if obj.type == "MESH":
+        obj.data.name = obj_name
+    if obj.active_material is not None:
+        obj.active_material.name = f"mat_{obj_name}"
+    bpy.context.view_layer.objects.active = obj
+
+
+def load_obj(obj_root, obj_name, center=True, join=False, smart_uv=False, cache=None):
     """
     Load obj/ply/glb file to Blender
 
@@ -32,7 +132,15 @@ def load_obj(obj_root, obj_name, center=True, join=False, smart_uv=False):
         obj_root (str): path to obj/ply/glb file
         obj_name (str): name of the object, used as the name of the mesh and material
         center (bool, optional): whether to center the object. Defaults to True.
+        cache (AssetCache, optional): on-disk cache of imported assets. Defaults to None.
     """
+    if cache is not None:
+        key = cache.key(obj_root, center=center, join=join, smart_uv=smart_uv)
+        obj = cache.load(key)
+        if obj is not None:
+            _name_obj(obj, obj_name)
+            return obj
+
     if obj_root.endswith(".obj"):
         bpy.ops.import_scene.obj(filepath=obj_root)
     elif obj_root.endswith(".ply"):
@@ -41,10 +149,11 @@ def load_obj(obj_root, obj_name, center=True, join=False, smart_uv=False):
         bpy.ops.import_scene.gltf(filepath=obj_root)
     else:
         raise NotImplementedError
-    bpy.context.selected_objects[0].name = obj_name
-    if bpy.context.selected_objects[0].type == "MESH":
-        bpy.context.selected_objects[0].data.name = obj_name
-    obj = bpy.data.objects[obj_name]
+    # keep the reference, the new name gets a suffix if obj_name is taken
+    obj = bpy.context.selected_objects[0]
+    obj.name = obj_name
+    if obj.type == "MESH":
+        obj.data.name = obj_name
 
     if join:
         join_objects([obj])
@@ -65,9 +174,145 @@ def load_obj(obj_root, obj_name, center=True, join=False, smart_uv=False):
         bpy.ops.mesh.select_all(action="SELECT")
         bpy.ops.uv.smart_project()
         bpy.ops.object.mode_set(mode="OBJECT")
+    if cache is not None:
+        cache.save(key, obj)
     return obj
 
 
+def _datablock_bytes(obj):
+    """
+    Rough memory footprint of the meshes and texture images used by obj and its children.
+    """
+    size = 0
+    meshes = {m.data for m in get_meshes(obj)}
+    images = set()
+    for mesh in meshes:
+        size += len(mesh.vertices) * 32 + len(mesh.loops) * 24 + len(mesh.polygons) * 16
+        for mat in mesh.materials:
+            if mat is None or mat.node_tree is None:
+                continue
+            for node in mat.node_tree.nodes:
+                if node.type == "TEX_IMAGE" and node.image is not None:
+                    images.add(node.image)
+    for img in images:
+        size += img.size[0] * img.size[1] * img.channels * (4 if img.is_float else 1)
+    return size
+
+
+def duplicate_linked(obj, collection=None):
+    """
+    Copy obj and its children, sharing their mesh data (like Alt+D), and link the copies to collection.
+
+    Args:
+        obj (bpy.types.Object): root object.
+        collection (bpy.types.Collection, optional): defaults to the active collection.
+
+    Returns:
+        bpy.types.Object: the copy of the root object.
+    """
+    if collection is None:
+        collection = bpy.context.view_layer.active_layer_collection.collection
+    copies = {}
+    for o in find_all_objects(obj):
+        copies[o] = o.copy()
+        copies[o].use_fake_user = False
+    for o, copy in copies.items():
+        if o.parent in copies:
+            copy.parent = copies[o.parent]
+        collection.objects.link(copy)
+    return copies[obj]
+
+
+class AssetPool:
+    """
+    Keep imported assets resident in bpy.data but unlinked from the scene, and hand
+    out linked duplicates sharing their meshes and materials. Assembling a scene
+    then costs one object copy per placement instead of one file import. Least
+    recently used assets are freed once the pool exceeds max_bytes (estimated from
+    mesh and texture sizes); assets still used by duplicates are never freed.
+
+    The pooled datablocks must survive scene resets:
+    >>> pool = AssetPool(max_bytes=4 * 2**30)
+    >>> obj = pool.acquire(path, "object", center=False, join=True)
+    >>> remover.clear_all(exclude=pool.datablocks())
+
+    Note: duplicates share materials with the pooled asset, so editing a material
+    node tree affects all of them. Assign a new material to modify one copy.
+    """
+
+    def __init__(self, max_bytes=None, cache=None):
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.assets = OrderedDict()  # key -> (template root, size)
+
+    def acquire(self, obj_root, obj_name, center=True, join=False, smart_uv=False):
+        """
+        Return a new linked duplicate of the asset, importing it (with load_obj) on first use.
+        """
+        key = (os.path.abspath(obj_root), center, join, smart_uv)
+        if key in self.assets:
+            self.assets.move_to_end(key)
+        else:
+            # import under an internal name, obj_name may already be held by a live duplicate
+            pool_name = f"pool.{hashlib.sha1(repr(key).encode()).hexdigest()[:8]}"
+            template = load_obj(obj_root, pool_name, center=center, join=join, smart_uv=smart_uv, cache=self.cache)
+            for o in find_all_objects(template):
+                for collection in list(o.users_collection):
+                    collection.objects.unlink(o)
+                o.use_fake_user = True
+            self.assets[key] = (template, _datablock_bytes(template))
+            self.evict()
+        obj = duplicate_linked(self.assets[key][0])
+        obj.name = obj_name
+        return obj
+
+    def datablocks(self):
+        """
+        All objects, meshes and materials held by the pool.
+        """
+        blocks = []
+        for template, _ in self.assets.values():
+            for o in find_all_objects(template):
+                blocks.append(o)
+                if o.data is not None:
+                    blocks.append(o.data)
+                blocks.extend(slot.material for slot in o.material_slots if slot.material is not None)
+        return blocks
+
+    def _in_use(self, template):
+        # each mesh is used once by its pooled object, more users are live duplicates
+        return any(o.data is not None and o.data.users > 1 for o in find_all_objects(template))
+
+    def evict(self):
+        """
+        Free least recently used assets that are not in use until the pool fits in max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size in self.assets.values())
+        for key in list(self.assets)[:-1]:  # never evict the newest asset
+            if total <= self.max_bytes:
+                break
+            template, size = self.assets[key]
+            if self._in_use(template):
+                continue
+            self.remove(key)
+            total -= size
+
+    def remove(self, key):
+        template, _ = self.assets.pop(key)
+        objs = find_all_objects(template)
+        meshes = {o.data for o in objs if isinstance(o.data, bpy.types.Mesh)}
+        mats = {slot.material for o in objs for slot in o.material_slots if slot.material is not None}
+        for o in objs:
+            bpy.data.objects.remove(o)
+        for mesh in meshes:
+            bpy.data.meshes.remove(mesh)
+        for mat in mats:
+            if mat.users == 0:
+                bpy.data.materials.remove(mat)
+
+
 def join_objects(objs):
     """
     Join multiple objects into one
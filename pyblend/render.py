@@ -1,24 +1,68 @@
+import os
 import bpy
 import math
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from mathutils import Matrix
 from pyblend.find import find_all_pass_index
+from pyblend.camera import look_at_poses, get_camera_para_batch
 
 
-def config_cycle_gpu(verbose=False):
-    devices = []
-    bpy.data.scenes[0].render.engine = "CYCLES"
-    bpy.context.preferences.addons["cycles"].preferences.compute_device_type = "CUDA"
-    bpy.context.scene.cycles.device = "GPU"
-    bpy.context.preferences.addons["cycles"].preferences.get_devices()
+GPU_BACKENDS = ("OPTIX", "CUDA", "HIP", "METAL", "ONEAPI")
+
+
+def config_device(device="AUTO", backends=GPU_BACKENDS, threads=None, verbose=False):
+    """
+    Select the Cycles render device. GPU backends are tried in order and all devices of
+    the first one found are enabled; without any, rendering falls back to the CPU.
+
+    Args:
+        device (str, optional): "AUTO" (GPU if available), "GPU" (same, but warn on fallback) or "CPU".
+            Defaults to "AUTO".
+        backends (List[str], optional): compute device types to try. Defaults to GPU_BACKENDS.
+        threads (int, optional): CPU render threads, see pyblend.farm.partition_cpus. Defaults to None (automatic).
+        verbose (bool, optional): print the selected devices. Defaults to False.
 
+    Returns:
+        dict: "device" ("GPU" or "CPU"), "backend" (compute device type or None) and "devices" (names).
+    """
+    scene = bpy.context.scene
+    scene.render.engine = "CYCLES"
+    scene.render.threads_mode = "AUTO" if threads is None else "FIXED"
+    if threads is not None:
+        scene.render.threads = threads
+    result = {"device": "CPU", "backend": None, "devices": []}
+    if device != "CPU":
+        prefs = bpy.context.preferences.addons["cycles"].preferences
+        for backend in backends:
+            try:
+                prefs.compute_device_type = backend
+            except TypeError:  # backend not supported by this build
+                continue
+            prefs.get_devices()
+            gpus = [d for d in prefs.devices if d.type == backend]
+            if not gpus:
+                continue
+            for d in prefs.devices:
+                d.use = d.type == backend
+            result = {"device": "GPU", "backend": backend, "devices": [d.name for d in gpus]}
+            break
+        if result["device"] == "CPU":
+            prefs.compute_device_type = "NONE"
+            if device == "GPU":
+                print("No GPU found, falling back to CPU rendering")
+    scene.cycles.device = result["device"]
     if verbose:
-        print(bpy.context.preferences.addons["cycles"].preferences.compute_device_type)
+        print(f"Cycles device: {result['device']} {result['backend'] or ''} {result['devices']}")
+    return result
 
-    for d in bpy.context.preferences.addons["cycles"].preferences.devices:
-        if d["name"][0] == "N":  # enable NVIDIA devices
-            d["use"] = 1
-            devices.append(d["name"])
 
-    return devices
+def config_cycle_gpu(verbose=False):
+    """
+    Enable the GPU devices, see config_device. Returns their names, empty if rendering on the CPU.
+    """
+    return config_device("GPU", verbose=verbose)["devices"]
 
 
 def config_cycles(pre_sample=1024, sample=4096):
@@ -30,10 +74,20 @@ def config_cycles(pre_sample=1024, sample=4096):
 
 
 def config_render(
-    path="tmp/output.png", engine="CYCLES", res_x=640, res_y=480, file_format="PNG", transparent=True, enable_gpu=True
+    path="tmp/output.png",
+    engine="CYCLES",
+    res_x=640,
+    res_y=480,
+    file_format="PNG",
+    transparent=True,
+    enable_gpu=True,
+    profile=None,
+    threads=None,
 ):
     """
-    Config render engine for path, engine, res_x, res_y, file_format, transparent
+    Config render engine for path, engine, res_x, res_y, file_format, transparent.
+    Cycles uses config_cycles() with denoising unless a profile from RENDER_PROFILES is given,
+    and renders on the GPU if enable_gpu and one is available, otherwise on threads CPU threads.
     """
 
     bpy.context.preferences.edit.undo_steps = 0  # disable undo
@@ -46,14 +100,138 @@ def config_render(
     render.resolution_y = res_y
     if engine.startswith("C"):
         render.engine = "CYCLES"
-        config_cycles()
-        bpy.data.scenes["Scene"].cycles.use_denoising = True
-        if enable_gpu:
-            config_cycle_gpu()
+        if profile is None:
+            config_cycles()
+            bpy.data.scenes["Scene"].cycles.use_denoising = True
+        else:
+            config_profile(profile, threads=threads)
+        config_device("GPU" if enable_gpu else "CPU", threads=threads)
     else:
         render.engine = "BLENDER_EEVEE"
 
 
+# Cycles presets, from cheap previews to final quality. "dataset" targets small
+# frames where most of the cost is noise-free geometry passes and a denoised rgb.
+RENDER_PROFILES = {
+    "preview": {
+        "samples": 16,
+        "adaptive_threshold": 0.1,
+        "max_bounces": 4,
+        "diffuse_bounces": 1,
+        "glossy_bounces": 1,
+        "transmission_bounces": 2,
+        "transparent_bounces": 4,
+        "denoiser": "OPENIMAGEDENOISE",
+        "persistent_data": True,
+        "tile_size": 2048,
+    },
+    "dataset": {
+        "samples": 128,
+        "adaptive_threshold": 0.02,
+        "max_bounces": 8,
+        "diffuse_bounces": 2,
+        "glossy_bounces": 4,
+        "transmission_bounces": 8,
+        "transparent_bounces": 8,
+        "denoiser": "OPENIMAGEDENOISE",
+        "persistent_data": True,
+        "tile_size": 2048,
+    },
+    "hero": {
+        "samples": 4096,
+        "adaptive_threshold": 0.005,
+        "max_bounces": 12,
+        "diffuse_bounces": 4,
+        "glossy_bounces": 4,
+        "transmission_bounces": 12,
+        "transparent_bounces": 8,
+        "denoiser": "OPENIMAGEDENOISE",
+        "persistent_data": False,
+        "tile_size": 512,
+    },
+}
+
+
+def config_profile(profile="dataset", threads=None, **overrides):
+    """
+    Apply a Cycles render profile: samples, adaptive sampling, light paths, denoiser,
+    persistent data, threads and tiling.
+
+    Args:
+        profile (str or dict, optional): name in RENDER_PROFILES or a dict of settings. Defaults to "dataset".
+        threads (int, optional): render threads. Defaults to None (automatic).
+        **overrides: settings replacing the ones of the profile, e.g. samples=64 or denoiser=None.
+
+    Returns:
+        dict: the applied settings.
+    """
+    if isinstance(profile, str):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown profile {profile}")
+        profile = RENDER_PROFILES[profile]
+    settings = dict(profile, **overrides)
+    scene = bpy.context.scene
+    cycles = scene.cycles
+    cycles.samples = settings["samples"]
+    cycles.preview_samples = settings["samples"]
+    cycles.use_adaptive_sampling = settings.get("adaptive_threshold") is not None
+    if cycles.use_adaptive_sampling:
+        cycles.adaptive_threshold = settings["adaptive_threshold"]
+    cycles.max_bounces = settings["max_bounces"]
+    cycles.diffuse_bounces = settings["diffuse_bounces"]
+    cycles.glossy_bounces = settings["glossy_bounces"]
+    cycles.transmission_bounces = settings["transmission_bounces"]
+    cycles.transparent_max_bounces = settings["transparent_bounces"]
+    cycles.use_denoising = settings.get("denoiser") is not None
+    if cycles.use_denoising:
+        cycles.denoiser = settings["denoiser"]
+    scene.render.use_persistent_data = settings.get("persistent_data", False)
+    scene.render.threads_mode = "AUTO" if threads is None else "FIXED"
+    if threads is not None:
+        scene.render.threads = threads
+    if hasattr(cycles, "tile_size"):  # Blender >= 3.0
+        cycles.use_auto_tile = True
+        cycles.tile_size = settings.get("tile_size", 2048)
+    return settings
+
+
+def calibrate_samples(sample_counts=(16, 32, 64, 128, 256, 512), reference_samples=None, denoise=True, verbose=True):
+    """
+    Render the current scene at increasing sample counts and report time vs. noise,
+    measured against the highest sample count (or reference_samples). Other profile
+    settings are kept, so call config_profile first.
+
+    Args:
+        sample_counts (List[int], optional): sample counts to try.
+        reference_samples (int, optional): samples of the reference render. Defaults to max(sample_counts).
+        denoise (bool, optional): keep the profile denoiser enabled. Defaults to True.
+        verbose (bool, optional): print a table. Defaults to True.
+
+    Returns:
+        List[dict]: one entry per sample count with "samples", "time" (seconds), "rmse" and "psnr"
+            of the rgb pass against the reference.
+    """
+    cycles = bpy.context.scene.cycles
+    old = cycles.samples, cycles.use_denoising
+    cycles.use_denoising = old[1] and denoise
+    cycles.samples = reference_samples if reference_samples is not None else max(sample_counts)
+    reference = render_to_arrays(["rgb"])["rgb"]
+
+    results = []
+    for samples in sorted(sample_counts):
+        cycles.samples = samples
+        start = time.time()
+        rgb = render_to_arrays(["rgb"])["rgb"]
+        elapsed = time.time() - start
+        rmse = float(np.sqrt(np.mean((np.clip(rgb, 0, 1) - np.clip(reference, 0, 1)) ** 2)))
+        psnr = float(20 * np.log10(1 / rmse)) if rmse > 0 else math.inf
+        results.append({"samples": samples, "time": elapsed, "rmse": rmse, "psnr": psnr})
+        if verbose:
+            print(f"samples {samples:5d}: {elapsed:7.2f} s, rmse {rmse:.4f}, psnr {psnr:.1f} dB")
+    cycles.samples, cycles.use_denoising = old
+    return results
+
+
 def enable_depth_render(base_path="output", reverse=False):
     """
     Enable depth render and output exr and png. The png is normalized to [0, 1]
@@ -163,17 +341,22 @@ def enable_normal_render(base_path="output"):
     return png_output_node
 
 
-def enable_segmentation_render(base_path="output", max_value=None):
+def enable_segmentation_render(base_path="output", max_value=None, mode="rainbow"):
     """
     In the segmentation render, each object is assigned a unique color.
     Each objects has the attribute pass_index, which is used to assign the color.
 
     Args:
         base_path (str, optional): base path to save the png. Defaults to "output".
-
+        max_value (int, optional): period of the color map. Defaults to the largest pass_index in the scene.
+        mode (str, optional): "rainbow" colors the png in the compositor with rainbow_link.
+            "index" writes the raw pass_index as a 16-bit grayscale png instead and saves
+            the color map to base_path/palette.npy; colorize it later with
+            pyblend.viztools.colorize_segmentation. Before Blender 3.5 the png node is muted
+            and only the exr holds the indices. Defaults to "rainbow".
 
     Returns:
-        png_output_node, exr_output_node
+        exr_output_node, png_output_node
     """
     bpy.context.scene.use_nodes = True
     bpy.data.scenes["Scene"].view_layers["ViewLayer"].use_pass_object_index = True
@@ -189,13 +372,33 @@ def enable_segmentation_render(base_path="output", max_value=None):
 
     png_output_node = nodes.new("CompositorNodeOutputFile")
     png_output_node.format.file_format = "PNG"
-    output_node1 = nodes.new("CompositorNodeSetAlpha")
-    rainbow_link(render_node.outputs["IndexOB"], output_node1.inputs[0], max_value=max_value)
-    output_node2 = nodes.new("CompositorNodeMath")
-    output_node2.operation = "CEIL"
-    link1 = links.new(render_node.outputs["IndexOB"], output_node2.inputs[0])
-    link2 = links.new(output_node2.outputs[0], output_node1.inputs[1])
-    link3 = links.new(output_node1.outputs[0], png_output_node.inputs[0])
+    if mode == "rainbow":
+        output_node1 = nodes.new("CompositorNodeSetAlpha")
+        rainbow_link(render_node.outputs["IndexOB"], output_node1.inputs[0], max_value=max_value)
+        output_node2 = nodes.new("CompositorNodeMath")
+        output_node2.operation = "CEIL"
+        link1 = links.new(render_node.outputs["IndexOB"], output_node2.inputs[0])
+        link2 = links.new(output_node2.outputs[0], output_node1.inputs[1])
+        link3 = links.new(output_node1.outputs[0], png_output_node.inputs[0])
+    elif mode == "index":
+        png_output_node.format.color_mode = "BW"
+        png_output_node.format.color_depth = "16"
+        if hasattr(png_output_node.format, "color_management"):  # Blender 3.5+, keep the values linear
+            png_output_node.format.color_management = "OVERRIDE"
+            png_output_node.format.view_settings.view_transform = "Raw"
+        else:
+            # the png would go through the scene view transform and the indices couldn't be recovered
+            print("Warning: this Blender can't write raw index pngs, only the exr is saved")
+            png_output_node.mute = True
+        # 16-bit png stores [0, 1], so pixel value = pass_index / 65535
+        output_node1 = nodes.new("CompositorNodeMath")
+        output_node1.operation = "DIVIDE"
+        output_node1.inputs[1].default_value = 65535
+        link1 = links.new(render_node.outputs["IndexOB"], output_node1.inputs[0])
+        link2 = links.new(output_node1.outputs[0], png_output_node.inputs[0])
+        save_palette(base_path, max_value)
+    else:
+        raise ValueError(f"Unknown mode {mode}")
     png_output_node.base_path = base_path
 
     exr_output_node = nodes.new("CompositorNodeOutputFile")
@@ -205,16 +408,38 @@ def enable_segmentation_render(base_path="output", max_value=None):
     return exr_output_node, png_output_node
 
 
+def rainbow_palette(max_value=2):
+    """
+    Color lookup table of rainbow_link: row k is the color of pass_index k, and
+    pass_index k + max_value has the same color as k.
+
+    Returns:
+        np.ndarray: (max_value, 3) float32 colors in [0, 1].
+    """
+    i = np.arange(max_value) / max_value
+    phase = 2 * math.pi * i[:, None] + np.array([0, 2, 4])
+    return (np.sin(phase) * 0.5 + 0.5).astype(np.float32)
+
+
+def save_palette(base_path, max_value):
+    """
+    Save rainbow_palette(max_value) to base_path/palette.npy.
+    """
+    os.makedirs(base_path, exist_ok=True)
+    np.save(os.path.join(base_path, "palette.npy"), rainbow_palette(max_value))
+
+
 def rainbow_link(input_node, output_node, max_value=2):
     """
     Link input_node to output_node with rainbow colors.
     The color is computed by sin function by following the formula:
     >>> i = input_value / max_value
-    >>> r = sin(2 * math.pi * i + 2) * 0.5 + 0.5
-    >>> g = sin(2 * math.pi * i + 4) * 0.5 + 0.5
-    >>> b = sin(2 * math.pi * i + 6) * 0.5 + 0.5
+    >>> r = sin(2 * math.pi * i) * 0.5 + 0.5
+    >>> g = sin(2 * math.pi * i + 2) * 0.5 + 0.5
+    >>> b = sin(2 * math.pi * i + 4) * 0.5 + 0.5
     >>> output_value = (r, g, b)
     where input_value is in [0, max_value] and output_value is in [0, 1]^3.
+    The same colors are available as a lookup table from rainbow_palette.
     """
     # normalize
     normalize_node = bpy.context.scene.node_tree.nodes.new("CompositorNodeMath")
@@ -281,7 +506,241 @@ def rainbow_link(input_node, output_node, max_value=2):
     link17 = bpy.context.scene.node_tree.links.new(combine_node.outputs[0], output_node)
 
 
+# render layer output and number of channels of each pass in render_to_arrays
+ARRAY_PASSES = {
+    "rgb": ("Image", 3),
+    "alpha": ("Alpha", 1),
+    "depth": ("Depth", 1),
+    "normal": ("Normal", 3),
+    "index": ("IndexOB", 1),
+}
+_writer = None
+_pending_writes = []
+
+
+def _pack_passes(passes):
+    """
+    Greedily pack passes into groups of at most 4 channels (one RGBA viewer image each).
+    "rgb" and "alpha" go first so the first group is always the beauty render.
+    """
+    groups = []
+    for name in sorted(passes, key=lambda name: name not in ("rgb", "alpha")):
+        channels = ARRAY_PASSES[name][1]
+        for group in groups:
+            if sum(ARRAY_PASSES[n][1] for n in group) + channels <= 4:
+                group.append(name)
+                break
+        else:
+            groups.append([name])
+    return groups
+
+
+def _link_viewer(group):
+    """
+    Route the channels of the passes in group into the RGBA channels of the array viewer node.
+    """
+    nodes = bpy.context.scene.node_tree.nodes
+    links = bpy.context.scene.node_tree.links
+    if "Render Layers" not in nodes:
+        render_node = nodes.new("CompositorNodeRLayers")
+    else:
+        render_node = nodes["Render Layers"]
+    if "pyblend_viewer" not in nodes:
+        viewer = nodes.new("CompositorNodeViewer")
+        viewer.name = "pyblend_viewer"
+        viewer.use_alpha = True
+        pack = nodes.new("CompositorNodeCombRGBA")
+        pack.name = "pyblend_pack"
+        links.new(pack.outputs[0], viewer.inputs[0])
+    viewer = nodes["pyblend_viewer"]
+    pack = nodes["pyblend_pack"]
+    for socket in list(pack.inputs) + [viewer.inputs[1]]:
+        for link in socket.links:
+            links.remove(link)
+    for socket in pack.inputs:
+        socket.default_value = 0
+    viewer.inputs[1].default_value = 1
+
+    sources = []
+    for name in group:
+        output, channels = ARRAY_PASSES[name]
+        if channels == 1:
+            sources.append(render_node.outputs[output])
+            continue
+        sep_name = f"pyblend_sep_{name}"
+        if sep_name not in nodes:
+            sep = nodes.new("CompositorNodeSepRGBA")
+            sep.name = sep_name
+            links.new(render_node.outputs[output], sep.inputs[0])
+        sources.extend(nodes[sep_name].outputs[:channels])
+    for i, source in enumerate(sources):
+        links.new(source, pack.inputs[i])
+    if len(sources) == 4:
+        links.new(sources[3], viewer.inputs[1])
+    nodes.active = viewer
+
+
+def _collect_writes():
+    """
+    Forget finished background writes, re-raising the error of a failed one.
+    """
+    done = [future for future in _pending_writes if future.done()]
+    for future in done:
+        _pending_writes.remove(future)
+    for future in done:
+        future.result()
+
+
+def _read_viewer():
+    img = bpy.data.images["Viewer Node"]
+    width, height = img.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    img.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, 4)[::-1]  # Blender stores rows bottom-up
+
+
+def render_to_arrays(passes=("rgb", "depth", "normal", "index"), save_path=None, fast_data_passes=True):
+    """
+    Render the current frame and return the requested passes as float32 arrays,
+    read from the compositor Viewer node with foreach_get instead of writing and
+    re-reading image files.
+
+    The Viewer node holds a single RGBA image, so passes are packed four channels
+    at a time (e.g. rgb + alpha, normal + index) and each pack is rendered
+    separately. With fast_data_passes, packs of only "depth" and "index" are
+    rendered with 1 Cycles sample and no denoising: Cycles takes both from the
+    first sample, so they come out the same. "normal" is averaged over all samples
+    and always renders at full quality. File Output nodes only write during the
+    first full quality render (the "rgb"/"alpha" pack if requested), and the first
+    pack is rendered at full quality when all of them could be fast.
+
+    Args:
+        passes (List[str]): passes to return, from "rgb", "alpha", "depth", "normal" and "index".
+        save_path (str, optional): if given, the arrays are also saved to this .npz file in a background thread.
+        fast_data_passes (bool, optional): render data-only packs cheaply. Defaults to True.
+
+    Returns:
+        dict: pass name -> (H, W, 3) array for "rgb" (scene linear) and "normal", (H, W) for the others.
+            "index" is int32.
+    """
+    unknown = [name for name in passes if name not in ARRAY_PASSES]
+    if unknown:
+        raise ValueError(f"Unknown passes {unknown}, expected any of {list(ARRAY_PASSES)}")
+    _collect_writes()  # surface errors of earlier background writes
+    scene = bpy.context.scene
+    scene.use_nodes = True
+    scene.render.use_compositing = True
+    view_layer = scene.view_layers["ViewLayer"]
+    view_layer.use_pass_z = view_layer.use_pass_z or "depth" in passes
+    view_layer.use_pass_normal = view_layer.use_pass_normal or "normal" in passes
+    view_layer.use_pass_object_index = view_layer.use_pass_object_index or "index" in passes
+
+    file_nodes = [node for node in scene.node_tree.nodes if node.bl_idname == "CompositorNodeOutputFile"]
+    file_mutes = [node.mute for node in file_nodes]
+    cycles = scene.cycles if scene.render.engine == "CYCLES" else None
+    if cycles is not None:
+        quality = cycles.samples, cycles.use_denoising
+
+    groups = _pack_passes(passes)
+    fast = [fast_data_passes and cycles is not None and set(group) <= {"depth", "index"} for group in groups]
+    if all(fast):  # File Output nodes need one full quality render
+        fast[0] = False
+
+    arrays = {}
+    written = False
+    try:
+        for group, fast_group in zip(groups, fast):
+            _link_viewer(group)
+            for node, mute in zip(file_nodes, file_mutes):
+                node.mute = mute or written or fast_group
+            if cycles is not None:
+                cycles.samples, cycles.use_denoising = (1, False) if fast_group else quality
+            bpy.ops.render.render()
+            written = written or not fast_group
+            pixels = _read_viewer()
+            channel = 0
+            for name in group:
+                channels = ARRAY_PASSES[name][1]
+                array = pixels[..., channel : channel + channels]
+                arrays[name] = np.ascontiguousarray(array if channels > 1 else array[..., 0])
+                channel += channels
+    finally:
+        if cycles is not None:
+            cycles.samples, cycles.use_denoising = quality
+        for node, mute in zip(file_nodes, file_mutes):
+            node.mute = mute
+    if "index" in arrays:
+        arrays["index"] = np.rint(arrays["index"]).astype(np.int32)
+
+    if save_path is not None:
+        global _writer
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=2)
+        _pending_writes.append(_writer.submit(np.savez, save_path, **arrays))
+    return arrays
+
+
+def wait_for_writes():
+    """
+    Block until all background writes started by render_to_arrays are done.
+    """
+    while _pending_writes:
+        _pending_writes.pop(0).result()
+
+
 def render_image(path=None):
     if path is not None:
         bpy.context.scene.render.filepath = path
     bpy.ops.render.render(write_still=True)
+
+
+def render_views(camera, poses, out_pattern, target=(0, 0, 0), frame_start=0, keep_animation=False):
+    """
+    Render many camera poses as a single animation job. Cycles keeps the scene
+    (BVH, kernels, textures) loaded between frames instead of rebuilding it for
+    every `render_image` call. File Output nodes of enabled passes are written
+    once per frame as usual.
+
+    Args:
+        camera (bpy.types.Object): camera object.
+        poses (np.ndarray): (N, 3) camera locations looking at target, or (N, 4, 4) camera-to-world matrices.
+        out_pattern (str): output path, "#" is replaced by the frame number, e.g. "tmp/out_####.png".
+        target (tuple, optional): point the camera looks at if poses are locations. Defaults to (0, 0, 0).
+        frame_start (int, optional): frame of the first pose. Defaults to 0.
+        keep_animation (bool, optional): keep the camera keyframes after rendering instead of
+            restoring the previous camera action. Defaults to False.
+
+    Returns:
+        dict: camera parameters of all frames, "intrinsic" (N, 3, 3) and "extrinsic" (N, 4, 4).
+    """
+    poses = np.asarray(poses, dtype=np.float64)
+    if poses.ndim == 2:
+        poses = look_at_poses(poses, target)
+    meta = get_camera_para_batch(camera, poses=poses)
+
+    scene = bpy.context.scene
+    old_range = scene.frame_start, scene.frame_end, scene.frame_step
+    old_filepath = scene.render.filepath
+    animation_data = camera.animation_data_create()
+    old_action = animation_data.action
+    animation_data.action = None  # keyframe into a new action, the caller's one is put back afterwards
+    try:
+        rotation_path = "rotation_quaternion" if camera.rotation_mode == "QUATERNION" else "rotation_euler"
+        for i, pose in enumerate(poses):
+            camera.matrix_world = Matrix(pose.tolist())
+            camera.keyframe_insert("location", frame=frame_start + i)
+            camera.keyframe_insert(rotation_path, frame=frame_start + i)
+        scene.frame_start, scene.frame_end, scene.frame_step = frame_start, frame_start + len(poses) - 1, 1
+        scene.render.filepath = out_pattern
+        bpy.ops.render.render(animation=True)
+    finally:
+        scene.frame_start, scene.frame_end, scene.frame_step = old_range
+        scene.render.filepath = old_filepath
+        if not keep_animation:
+            action = animation_data.action
+            animation_data.action = old_action
+            if action is not None and action is not old_action:
+                bpy.data.actions.remove(action)
+
+    del meta["pose"]
+    return meta
@@ -0,0 +1,164 @@
+"""
+Seeded scene randomization.
+
+The helpers random_loc, random_transform, random_mat and config_world draw from
+the global numpy.random state, so one scene can't be reproduced without replaying
+every scene rendered before it. SceneSampler draws all parameters of a scene
+up front from its own generator, vectorized across objects, views and lights.
+The draws form a JSON record that is saved next to the outputs and can be
+re-applied later, e.g. to re-render a single failed frame on another worker.
+
+>>> sampler = SceneSampler(scene_seed(42, "scene_0007"))
+>>> record = sampler.draw(num_objects=len(objs), num_views=4)
+>>> sampler.apply(record, objs, view=2)
+>>> save_record(record, "tmp/scene_0007/scene.json")
+"""
+import bpy
+import json
+import zlib
+import numpy as np
+from mathutils import Matrix, Euler
+from pyblend.material import random_mat
+from pyblend.lighting import config_world
+from pyblend.transform import look_at
+
+MATERIAL_KINDS = ("transparent", "metallic")
+
+
+def scene_seed(base_seed, key):
+    """
+    Derive the seed of one scene from a run seed and the scene id (int or str),
+    independent of the order in which scenes are rendered.
+    """
+    if isinstance(key, str):
+        key = zlib.crc32(key.encode())
+    return int(np.random.SeedSequence([base_seed, key]).generate_state(1)[0])
+
+
+def _spherical(rng, num, center, radius, theta, phi):
+    """
+    Vectorized random_loc: num points around center.
+    """
+    radius = rng.uniform(radius[0], radius[1], num)
+    theta = rng.uniform(theta[0], theta[1], num) * np.pi
+    phi = rng.uniform(phi[0], phi[1], num) * np.pi
+    directions = np.stack([np.cos(phi) * np.cos(theta), np.cos(phi) * np.sin(theta), np.sin(phi)], axis=1)
+    return np.asarray(center, dtype=np.float64) + directions * radius[:, None]
+
+
+class SceneSampler:
+    """
+    Draw and apply the random parameters of one scene.
+
+    Args:
+        seed (int): scene seed, see scene_seed.
+        offset_scale (float, optional): object translation range, as in random_transform. Defaults to 2.
+        camera_radius (Tuple[float, float], optional): camera distance range. Defaults to (8, 8).
+        camera_theta (Tuple[float, float], optional): camera azimuth range in units of pi. Defaults to (-1, 1).
+        camera_phi (Tuple[float, float], optional): camera elevation range in units of pi. Defaults to (0, 1).
+        world_strength (Tuple[float, float], optional): world strength range. Defaults to (0, 0.05).
+        light_center (tuple, optional): lights are placed around this point. Defaults to (0, 0, 5).
+        light_radius (float, optional): max distance of the lights to light_center. Defaults to 2.
+        light_energy (Tuple[float, float], optional): light energy range. Defaults to (300, 700).
+    """
+
+    def __init__(
+        self,
+        seed,
+        offset_scale=2,
+        camera_radius=(8, 8),
+        camera_theta=(-1, 1),
+        camera_phi=(0, 1),
+        world_strength=(0, 0.05),
+        light_center=(0, 0, 5),
+        light_radius=2,
+        light_energy=(300, 700),
+    ):
+        self.seed = seed
+        self.offset_scale = offset_scale
+        self.camera_radius = camera_radius
+        self.camera_theta = camera_theta
+        self.camera_phi = camera_phi
+        self.world_strength = world_strength
+        self.light_center = light_center
+        self.light_radius = light_radius
+        self.light_energy = light_energy
+
+    def draw(self, num_objects, num_views=0, num_lights=0):
+        """
+        Draw every parameter of the scene. The same seed and arguments always give the same record.
+
+        Returns:
+            dict: JSON-serializable record with "seed", "objects" (rotation, offset, material,
+                color and material_values per object), "world", "lights" and "cameras".
+        """
+        rng = np.random.default_rng(self.seed)
+        kinds = rng.integers(0, len(MATERIAL_KINDS), num_objects)
+        uniform = rng.random((num_objects, 10))
+        material_values = np.where(kinds[:, None] == 0, 0.9 + uniform * 0.1, uniform / 5)
+        record = {
+            "seed": self.seed,
+            "objects": {
+                "rotation": rng.uniform(0, 2 * np.pi, (num_objects, 3)).tolist(),  # XYZ euler
+                "offset": (rng.uniform(-1, 1, (num_objects, 3)) * self.offset_scale).tolist(),
+                "material": [MATERIAL_KINDS[kind] for kind in kinds],
+                "color": rng.uniform(0.3, 0.9, (num_objects, 4)).tolist(),
+                "material_values": material_values.tolist(),
+            },
+            "world": {
+                "strength": float(rng.uniform(*self.world_strength)),
+                "color": [1.0, 1.0, 1.0, float(0.8 + rng.random() * 0.2)],
+            },
+            "lights": {
+                "location": _spherical(
+                    rng, num_lights, self.light_center, (0, self.light_radius), (-0.5, 0.5), (-1, 1)
+                ).tolist(),
+                "energy": rng.uniform(*self.light_energy, num_lights).tolist(),
+            },
+            "cameras": _spherical(
+                rng, num_views, (0, 0, 0), self.camera_radius, self.camera_theta, self.camera_phi
+            ).tolist(),
+        }
+        return record
+
+    def apply(self, record, objects, lights=(), camera=None, view=None, target=(0, 0, 0)):
+        """
+        Apply a record to the scene.
+
+        Args:
+            record (dict): record returned by draw or load_record.
+            objects (List[bpy.types.Object]): objects in the order they were drawn for.
+            lights (List[bpy.types.Object], optional): lights in the order they were drawn for.
+            camera (bpy.types.Object, optional): camera to move. Defaults to bpy.data.objects["Camera"].
+            view (int, optional): index of the camera location to apply. Defaults to None (camera untouched).
+            target (tuple, optional): point the camera looks at. Defaults to (0, 0, 0).
+        """
+        params = record["objects"]
+        for i, obj in enumerate(objects):
+            rotation = Euler(params["rotation"][i], "XYZ").to_matrix().to_4x4()
+            # same composition as random_transform: rotate about the origin, then translate
+            obj.matrix_world = rotation @ Matrix.Translation(params["offset"][i]) @ obj.matrix_world
+            # pooled duplicates share their material, randomize a private copy
+            mat = obj.active_material.copy() if obj.active_material is not None else None
+            obj.active_material = random_mat(
+                mat, params["color"][i], params["material"][i], params["material_values"][i]
+            )
+        config_world(record["world"]["strength"], record["world"]["color"])
+        for light, location, energy in zip(lights, record["lights"]["location"], record["lights"]["energy"]):
+            light.location = location
+            light.data.energy = energy
+        if view is not None:
+            camera = camera if camera is not None else bpy.data.objects["Camera"]
+            camera.location = record["cameras"][view]
+            look_at(camera, target)
+        bpy.context.view_layer.update()
+
+
+def save_record(record, path):
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+
+
+def load_record(path):
+    with open(path) as f:
+        return json.load(f)
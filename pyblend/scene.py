@@ -0,0 +1,246 @@
+"""
+Declarative scene specs applied incrementally.
+
+A spec is a JSON-serializable dict describing a whole scene:
+>>> spec = {
+...     "objects": {
+...         "bunny": {
+...             "asset": "docs/bunny.obj",
+...             "matrix": [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0.5], [0, 0, 0, 1]],
+...             "material": {"kind": "metallic", "color": [0.8, 0.2, 0.2, 1]},
+...             "pass_index": 1,
+...         },
+...     },
+...     "lights": {"key": {"type": "POINT", "location": [3, 3, 5], "energy": 500}},
+...     "camera": {"location": [0, -6, 2], "target": [0, 0, 0]},
+...     "world": {"strength": 0.3},
+...     "passes": {"depth": {"base_path": "tmp/scene", "reverse": True}},
+... }
+>>> applier = SceneApplier(pool=AssetPool())
+>>> applier.apply(spec)
+>>> spec["objects"]["bunny"]["matrix"][2][3] = 1.0
+>>> applier.apply(spec)  # only moves the bunny
+
+SceneApplier remembers the last applied spec and diffs the next one against
+it: unchanged objects keep their imported data, moved objects only get a new
+matrix_world and the compositor is left alone unless the passes changed.
+"""
+import bpy
+import copy
+import json
+from mathutils import Matrix
+from pyblend.object import load_obj
+from pyblend.find import find_all_objects
+from pyblend.transform import look_at, normalize_obj
+from pyblend.lighting import config_world, create_light
+from pyblend.material import random_mat
+from pyblend.compositor import build_compositor
+
+# object fields that require importing the asset again
+ASSET_FIELDS = ("asset", "center", "join", "normalize")
+LIGHT_FIELDS = ("type", "size")
+SECTIONS = ("camera", "world", "passes")
+
+
+def _alive(obj):
+    """
+    Whether obj still refers to an object in bpy.data (e.g. not removed by clear_all).
+    """
+    try:
+        return bpy.data.objects.get(obj.name) == obj
+    except ReferenceError:
+        return False
+
+
+def _diff_named(old, new, rebuild_fields):
+    """
+    Diff two name -> spec dicts.
+    """
+    diff = {"added": [], "removed": [], "rebuilt": [], "changed": {}}
+    for name in old:
+        if name not in new:
+            diff["removed"].append(name)
+    for name, spec in new.items():
+        if name not in old:
+            diff["added"].append(name)
+            continue
+        fields = [key for key in set(spec) | set(old[name]) if spec.get(key) != old[name].get(key)]
+        if any(field in rebuild_fields for field in fields):
+            diff["rebuilt"].append(name)
+        elif fields:
+            diff["changed"][name] = sorted(fields)
+    return diff
+
+
+def diff_specs(old, new):
+    """
+    Compute what changed between two scene specs.
+
+    Returns:
+        dict: "objects" and "lights" diffs with "added", "removed", "rebuilt" (re-created)
+            and "changed" (name -> changed fields), plus a boolean per "camera", "world" and "passes".
+    """
+    diff = {
+        "objects": _diff_named(old.get("objects", {}), new.get("objects", {}), ASSET_FIELDS),
+        "lights": _diff_named(old.get("lights", {}), new.get("lights", {}), LIGHT_FIELDS),
+    }
+    for section in SECTIONS:
+        diff[section] = old.get(section) != new.get(section)
+    return diff
+
+
+class SceneApplier:
+    """
+    Bring the Blender scene in line with a scene spec, touching only what changed since the last apply.
+
+    Args:
+        pool (pyblend.object.AssetPool, optional): assets are acquired from the pool if given.
+        cache (pyblend.object.AssetCache, optional): used by load_obj when there is no pool.
+        camera (bpy.types.Object, optional): camera object. Defaults to bpy.data.objects["Camera"].
+    """
+
+    def __init__(self, pool=None, cache=None, camera=None):
+        self.pool = pool
+        self.cache = cache
+        self.camera = camera if camera is not None else bpy.data.objects["Camera"]
+        self.spec = {}
+        self.objects = {}  # name -> root object
+        self.bases = {}  # name -> matrix_world after import and normalization
+        self.lights = {}
+
+    def _add_object(self, name, spec):
+        center, join = spec.get("center", False), spec.get("join", True)
+        if self.pool is not None:
+            obj = self.pool.acquire(spec["asset"], name, center=center, join=join)
+        else:
+            obj = load_obj(spec["asset"], name, center=center, join=join, cache=self.cache)
+        if spec.get("normalize", True):
+            obj.location = (0, 0, 0)
+            normalize_obj(obj)
+        self.objects[name] = obj
+        self.bases[name] = obj.matrix_world.copy()
+        self._update_object(name, spec, spec.keys())
+
+    def _update_object(self, name, spec, fields):
+        obj = self.objects[name]
+        if "matrix" in fields:
+            obj.matrix_world = Matrix(spec.get("matrix", Matrix.Identity(4))) @ self.bases[name]
+        if "pass_index" in fields:
+            for o in find_all_objects(obj):
+                o.pass_index = spec.get("pass_index", 0)
+        if "material" in fields and spec.get("material") is not None:
+            material = spec["material"]
+            # pooled duplicates share their materials, give every object its own
+            mat = bpy.data.materials.get(f"scene_{name}")
+            if mat is None:
+                mat = bpy.data.materials.new(f"scene_{name}")
+                mat.use_nodes = True
+            random_mat(mat, material.get("color"), material.get("kind"), material.get("values"))
+            for o in find_all_objects(obj):
+                if o.type == "MESH":
+                    o.active_material = mat
+
+    def _remove_object(self, name):
+        obj = self.objects.pop(name)
+        del self.bases[name]
+        meshes = {o.data for o in find_all_objects(obj) if o.type == "MESH"}
+        for o in find_all_objects(obj):
+            bpy.data.objects.remove(o)
+        for mesh in meshes:
+            if mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+        mat = bpy.data.materials.get(f"scene_{name}")
+        if mat is not None and mat.users == 0:
+            bpy.data.materials.remove(mat)
+
+    def _add_light(self, name, spec):
+        self.lights[name] = create_light(
+            spec.get("type", "POINT"),
+            spec.get("location", (0, 0, 2)),
+            spec.get("rotation", (0, 0, 0)),
+            spec.get("energy", 2),
+            spec.get("color", (1, 1, 1)),
+            spec.get("size", 1),
+            name=name,
+        )
+
+    def _update_light(self, name, spec, fields):
+        light = self.lights[name]
+        if "location" in fields:
+            light.location = spec.get("location", (0, 0, 2))
+        if "rotation" in fields:
+            light.rotation_euler = spec.get("rotation", (0, 0, 0))
+        if "energy" in fields:
+            light.data.energy = spec.get("energy", 2)
+        if "color" in fields:
+            light.data.color = spec.get("color", (1, 1, 1))
+
+    def _remove_light(self, name):
+        light = self.lights.pop(name)
+        data = light.data
+        bpy.data.objects.remove(light)
+        if data.users == 0:
+            bpy.data.lights.remove(data)
+
+    def _apply_camera(self, spec):
+        if "matrix" in spec:
+            self.camera.matrix_world = Matrix(spec["matrix"])
+        else:
+            self.camera.location = spec.get("location", self.camera.location)
+            look_at(self.camera, spec.get("target", (0, 0, 0)))
+        if "lens" in spec:
+            self.camera.data.lens = spec["lens"]
+
+    def apply(self, spec):
+        """
+        Apply spec, diffing it against the previously applied one.
+
+        Args:
+            spec (dict): scene spec, see the module docstring.
+
+        Returns:
+            dict: the diff that was applied, see diff_specs.
+        """
+        # objects deleted behind our back are imported again
+        self.objects = {name: obj for name, obj in self.objects.items() if _alive(obj)}
+        self.lights = {name: light for name, light in self.lights.items() if _alive(light)}
+        old = copy.deepcopy(self.spec)
+        old["objects"] = {name: value for name, value in old.get("objects", {}).items() if name in self.objects}
+        old["lights"] = {name: value for name, value in old.get("lights", {}).items() if name in self.lights}
+        diff = diff_specs(old, spec)
+
+        objects, lights = spec.get("objects", {}), spec.get("lights", {})
+        for name in diff["objects"]["removed"] + diff["objects"]["rebuilt"]:
+            self._remove_object(name)
+        for name in diff["objects"]["added"] + diff["objects"]["rebuilt"]:
+            self._add_object(name, objects[name])
+        for name, fields in diff["objects"]["changed"].items():
+            self._update_object(name, objects[name], fields)
+
+        for name in diff["lights"]["removed"] + diff["lights"]["rebuilt"]:
+            self._remove_light(name)
+        for name in diff["lights"]["added"] + diff["lights"]["rebuilt"]:
+            self._add_light(name, lights[name])
+        for name, fields in diff["lights"]["changed"].items():
+            self._update_light(name, lights[name], fields)
+
+        if diff["camera"] and spec.get("camera") is not None:
+            self._apply_camera(spec["camera"])
+        if diff["world"] and spec.get("world") is not None:
+            config_world(spec["world"].get("strength", 0.3), spec["world"].get("color", (1, 1, 1, 1)))
+        if diff["passes"]:
+            build_compositor(spec.get("passes", {}))
+
+        bpy.context.view_layer.update()
+        self.spec = copy.deepcopy(spec)
+        return diff
+
+
+def save_spec(spec, path):
+    with open(path, "w") as f:
+        json.dump(spec, f, indent=2)
+
+
+def load_spec(path):
+    with open(path) as f:
+        return json.load(f)
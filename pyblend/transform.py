@@ -4,6 +4,7 @@ import numpy as np
 from mathutils import Matrix, Vector
 from numpy.random import rand, uniform
 from pyblend.find import find_all_meshes, scene_meshes, scene_root_objects
+from pyblend.mesh import mesh_arrays
 
 
 def get_vertices(obj_or_mesh: bpy.types.Object or bpy.types.Mesh, mode="obj"):
@@ -17,7 +18,7 @@ def get_vertices(obj_or_mesh: bpy.types.Object or bpy.types.Mesh, mode="obj"):
     mesh = obj_or_mesh.data if isinstance(obj_or_mesh, bpy.types.Object) else obj_or_mesh
     assert mesh is not None, "mesh is None"
     vertices = np.ones(len(mesh.vertices) * 3)
-    obj_or_mesh.data.vertices.foreach_get("co", vertices)
+    mesh.vertices.foreach_get("co", vertices)
     vertices = vertices.reshape(-1, 3)  # (N, 3)
     if mode == "world":
         # vertices = np.array([obj_or_mesh.matrix_world @ Vector(v) for v in vertices])
@@ -28,27 +29,32 @@ def get_vertices(obj_or_mesh: bpy.types.Object or bpy.types.Mesh, mode="obj"):
     return vertices
 
 
-def set_vertices(obj_or_mesh: bpy.types.Object or bpy.types.Mesh, vertices):
+def set_vertices(obj_or_mesh: bpy.types.Object or bpy.types.Mesh, vertices, update=True):
     """
     Set the vertices of the given object or mesh.
-    Not suggested to use this function for complex meshes or objects.
+    For per-frame deformation, bake the whole sequence with pyblend.mesh.bake_mesh_cache instead.
+
+    Args:
+        obj_or_mesh (bpy.types.Object or bpy.types.Mesh): The object or mesh.
+        vertices (np.ndarray): (N, 3) vertex positions.
+        update (bool, optional): If True, recompute normals and derived data with mesh.update(),
+            otherwise only tag the mesh for the depsgraph. Defaults to True.
     """
     mesh: bpy.types.Mesh = obj_or_mesh.data if isinstance(obj_or_mesh, bpy.types.Object) else obj_or_mesh
     assert mesh is not None, "mesh is None"
-    mesh.vertices.foreach_set("co", vertices.reshape(-1))
-    mesh.update()
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1))
+    if update:
+        mesh.update()
+    else:
+        mesh.update_tag()
 
 
 def get_faces(obj_or_mesh: bpy.types.Object or bpy.types.Mesh):
     """
-    Get the faces of the given object or mesh.
+    Get the faces of the given object or mesh as (N, 3) int32 vertex indices.
+    Quads and n-gons are triangulated, see pyblend.mesh.mesh_arrays.
     """
-    mesh = obj_or_mesh.data if isinstance(obj_or_mesh, bpy.types.Object) else obj_or_mesh
-    assert mesh is not None, "mesh is None"
-    faces = np.ones(len(mesh.polygons) * 3)
-    mesh.polygons.foreach_get("vertices", faces)
-    faces = faces.reshape(-1, 3)  # (N, 3)
-    return faces
+    return mesh_arrays(obj_or_mesh, ["triangles"])["triangles"]
 
 
 def random_loc(loc, radius=[0, 1], theta=[-0.5, 0.5], phi=[-1, 1]):
@@ -109,12 +115,44 @@ def _normalize_obj(obj_or_mesh: bpy.types.Object or bpy.types.Mesh):
     Not suggested to use this function for complex meshes or objects.
     """
     vertices = get_vertices(obj_or_mesh)
-    vertices, center, scale = center_vert_bbox(vertices, scale=True)
-    set_vertices(obj_or_mesh, vertices)
+    _, center, scale = center_vert_bbox(vertices, scale=True)
+    # apply in C instead of writing the vertex buffer back from Python
+    transform(obj_or_mesh, Matrix.Scale(1 / scale, 4) @ Matrix.Translation(-Vector(center)))
     return scale
 
 
-def scene_bbox(single_obj=None, ignore_matrix=False):
+def _bbox_points(objs, ignore_matrix=False, exact=False):
+    """
+    Gather the points bounding the given objects in one shot: the 8 bound_box
+    corners of every object, or all their vertices if exact.
+
+    Args:
+        objs (List[bpy.types.Object]): The objects.
+        ignore_matrix (bool, optional): If True, keep the points in object space. Defaults to False.
+        exact (bool, optional): If True, use the mesh vertices instead of the bound_box corners. Defaults to False.
+
+    Returns:
+        np.ndarray: (N, 3) points.
+    """
+    if len(objs) == 0:
+        return np.zeros((0, 3))
+    if exact:
+        mode = "obj" if ignore_matrix else "world"
+        return np.concatenate([get_vertices(obj, mode=mode) for obj in objs], axis=0)
+    corners = np.array([obj.bound_box for obj in objs], dtype=np.float64)  # (M, 8, 3)
+    if not ignore_matrix:
+        matrices = np.array([obj.matrix_world for obj in objs], dtype=np.float64)  # (M, 4, 4)
+        corners = np.einsum("mij,mkj->mki", matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    return corners.reshape(-1, 3)
+
+
+def _bbox_minmax(points):
+    if len(points) == 0:
+        return np.full(3, math.inf), np.full(3, -math.inf)
+    return points.min(0), points.max(0)
+
+
+def scene_bbox(single_obj=None, ignore_matrix=False, exact=False):
     """
     Compute the bounding box of the scene.
     Refers to https://github.com/cvlab-columbia/zero123/blob/main/objaverse-rendering/scripts/blender_script.py
@@ -122,27 +160,19 @@ def scene_bbox(single_obj=None, ignore_matrix=False):
     Args:
         single_obj (bpy.types.Object, optional): If not None, only compute the bounding box of this object. Defaults to None.
         ignore_matrix (bool, optional): If True, ignore the matrix_world of the object. Defaults to False.
+        exact (bool, optional): If True, bound the mesh vertices instead of the local bounding boxes. Defaults to False.
 
     Returns:
         Tuple[Vector, Vector]: The minimum and maximum coordinates of the bounding box.
     """
-    bbox_min = (math.inf,) * 3
-    bbox_max = (-math.inf,) * 3
-    found = False
-    for obj in scene_meshes() if single_obj is None else [single_obj]:
-        found = True
-        for coord in obj.bound_box:
-            coord = Vector(coord)
-            if not ignore_matrix:
-                coord = obj.matrix_world @ coord
-            bbox_min = tuple(min(x, y) for x, y in zip(bbox_min, coord))
-            bbox_max = tuple(max(x, y) for x, y in zip(bbox_max, coord))
-    if not found:
+    objs = list(scene_meshes()) if single_obj is None else [single_obj]
+    if len(objs) == 0:
         raise RuntimeError("no objects in scene to compute bounding box for")
+    bbox_min, bbox_max = _bbox_minmax(_bbox_points(objs, ignore_matrix, exact))
     return Vector(bbox_min), Vector(bbox_max)
 
 
-def obj_bbox(obj: bpy.types.Object, ignore_matrix=False, mode="minmax"):
+def obj_bbox(obj: bpy.types.Object, ignore_matrix=False, mode="minmax", exact=False):
     """
     Compute the bounding box of the given object.
 
@@ -150,30 +180,18 @@ def obj_bbox(obj: bpy.types.Object, ignore_matrix=False, mode="minmax"):
         obj (bpy.types.Object): The object
         ignore_matrix (bool, optional): If True, ignore the matrix_world of the object. Defaults to False.
         mode (str, optional): "minmax" or "box". Defaults to "minmax".
+        exact (bool, optional): If True, bound the mesh vertices instead of the local bounding boxes. Defaults to False.
 
     Returns:
         Tuple[Vector, Vector]: The minimum and maximum coordinates of the bounding box.
     """
+    meshes = find_all_meshes(obj)
     if mode == "minmax":
-        bbox_min = (math.inf,) * 3
-        bbox_max = (-math.inf,) * 3
-        for obj in find_all_meshes(obj):
-            for coord in obj.bound_box:
-                coord = Vector(coord)
-                if not ignore_matrix:
-                    coord = obj.matrix_world @ coord
-                bbox_min = tuple(min(x, y) for x, y in zip(bbox_min, coord))
-                bbox_max = tuple(max(x, y) for x, y in zip(bbox_max, coord))
+        bbox_min, bbox_max = _bbox_minmax(_bbox_points(meshes, ignore_matrix, exact))
         return Vector(bbox_min), Vector(bbox_max)
     elif mode == "box":
         # return a 8 * 3 array
-        bbox_min = (math.inf,) * 3
-        bbox_max = (-math.inf,) * 3
-        for obj in find_all_meshes(obj):
-            for coord in obj.bound_box:
-                coord = Vector(coord)
-                bbox_min = tuple(min(x, y) for x, y in zip(bbox_min, coord))
-                bbox_max = tuple(max(x, y) for x, y in zip(bbox_max, coord))
+        bbox_min, bbox_max = _bbox_minmax(_bbox_points(meshes, ignore_matrix=True, exact=exact))
         # canonical box
         box = np.array(
             [
@@ -188,41 +206,48 @@ def obj_bbox(obj: bpy.types.Object, ignore_matrix=False, mode="minmax"):
             ]
         )
         if not ignore_matrix:
+            matrix_world = meshes[-1].matrix_world if meshes else obj.matrix_world
             box = np.concatenate([box, np.ones((8, 1))], axis=1)
-            box = box @ np.array(obj.matrix_world).T
+            box = box @ np.array(matrix_world).T
             box = box[:, :3]
         return box
     else:
         raise ValueError(f"Unknown mode {mode}")
 
 
-def normalize_scene():
+def normalize_scene(exact=False):
     """
     Normalize the scene to have unit bounding box and center at the world origin.
+
+    Args:
+        exact (bool, optional): If True, use vertex-based bounds, see scene_bbox. Defaults to False.
     """
-    bbox_min, bbox_max = scene_bbox()
+    bbox_min, bbox_max = scene_bbox(exact=exact)
     scale = 1 / max(bbox_max - bbox_min)
     for obj in scene_root_objects():
         obj.scale = obj.scale * scale
     # Apply scale to matrix_world.
     bpy.context.view_layer.update()
-    bbox_min, bbox_max = scene_bbox()
+    bbox_min, bbox_max = scene_bbox(exact=exact)
     offset = -(bbox_min + bbox_max) / 2
     for obj in scene_root_objects():
         obj.matrix_world.translation += offset
     bpy.ops.object.select_all(action="DESELECT")
 
 
-def normalize_obj(obj: bpy.types.Object):
+def normalize_obj(obj: bpy.types.Object, exact=False):
     """
     Normalize the object to have unit bounding box and center at the world origin.
+
+    Args:
+        exact (bool, optional): If True, use vertex-based bounds, see obj_bbox. Defaults to False.
     """
-    bbox_min, bbox_max = obj_bbox(obj)
+    bbox_min, bbox_max = obj_bbox(obj, exact=exact)
     scale = 1 / max(bbox_max - bbox_min)
     obj.scale = obj.scale * scale
     # Apply scale to matrix_world.
     bpy.context.view_layer.update()
-    bbox_min, bbox_max = obj_bbox(obj)
+    bbox_min, bbox_max = obj_bbox(obj, exact=exact)
     offset = -(bbox_min + bbox_max) / 2
     obj.matrix_world = Matrix.Translation(offset) @ obj.matrix_world
     bpy.context.view_layer.update()
@@ -267,6 +292,63 @@ def persp_project(points3d, cam_intr):
     return points2d.astype(np.float32)
 
 
+def batch_project(points3d, extrinsics, intrinsics, width=None, height=None, near=1e-3, far=None):
+    """
+    Project many point sets into many views at once.
+
+    Args:
+        points3d (np.ndarray): (M, P, 3) world-space points, e.g. stacked obj_bbox(obj, mode="box").
+        extrinsics (np.ndarray): (V, 4, 4) world-to-cv matrices, e.g. get_camera_para_batch(...)["extrinsic"].
+        intrinsics (np.ndarray): (V, 3, 3) or (3, 3) intrinsic matrices.
+        width (int, optional): image width. Defaults to the scene resolution.
+        height (int, optional): image height. Defaults to the scene resolution.
+        near (float, optional): points closer than near are behind the camera. Defaults to 1e-3.
+        far (float, optional): points farther than far are outside the frustum. Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (V, M, P, 2) pixel coordinates (NaN behind the
+            camera), (V, M, P) depths and (V, M, P) in-frustum masks.
+    """
+    if width is None or height is None:
+        scale = bpy.context.scene.render.resolution_percentage / 100
+        width = bpy.context.scene.render.resolution_x * scale
+        height = bpy.context.scene.render.resolution_y * scale
+    points3d = np.asarray(points3d, dtype=np.float64)
+    extrinsics = np.asarray(extrinsics, dtype=np.float64).reshape(-1, 4, 4)
+    intrinsics = np.broadcast_to(np.asarray(intrinsics, dtype=np.float64), (len(extrinsics), 3, 3))
+    points_cam = np.einsum("vij,mpj->vmpi", extrinsics[:, :3, :3], points3d) + extrinsics[:, None, None, :3, 3]
+    hom_2d = np.einsum("vij,vmpj->vmpi", intrinsics, points_cam)
+    depth = points_cam[..., 2]
+    in_front = depth > near
+    with np.errstate(divide="ignore", invalid="ignore"):
+        points2d = np.where(in_front[..., None], hom_2d[..., :2] / depth[..., None], np.nan)
+    mask = in_front & (points2d[..., 0] >= 0) & (points2d[..., 0] < width)
+    mask &= (points2d[..., 1] >= 0) & (points2d[..., 1] < height)
+    if far is not None:
+        mask &= depth < far
+    return points2d.astype(np.float32), depth.astype(np.float32), mask
+
+
+def views_in_frame(points3d, extrinsics, intrinsics, width=None, height=None, min_fraction=1.0):
+    """
+    Find the views in which every point set stays in the frame.
+
+    Args:
+        points3d (np.ndarray): (M, P, 3) world-space points, e.g. one bounding box per object.
+        extrinsics (np.ndarray): (V, 4, 4) world-to-cv matrices.
+        intrinsics (np.ndarray): (V, 3, 3) or (3, 3) intrinsic matrices.
+        width (int, optional): image width. Defaults to the scene resolution.
+        height (int, optional): image height. Defaults to the scene resolution.
+        min_fraction (float, optional): fraction of the points of every set that must be
+            inside the frustum. Defaults to 1 (all of them).
+
+    Returns:
+        np.ndarray: (V,) boolean mask of the accepted views.
+    """
+    _, _, mask = batch_project(points3d, extrinsics, intrinsics, width, height)
+    return (mask.mean(axis=2) >= min_fraction).all(axis=1)
+
+
 def circle2d_coords(radius, steps, offset, ox, oy):
     """
     Generates 2D coordinates of a circle.
@@ -106,19 +106,19 @@ class BlenderRemover:
             exclude (List): objects, meshes, materials, and images to be excluded
         """
         for mat in bpy.data.materials:
-            if mat not in exclude or mat.name not in exclude:
+            if mat not in exclude and mat.name not in exclude:
                 bpy.data.materials.remove(mat)
         for obj in bpy.data.objects:
             # keep camera if only one camera is left
             if obj.type == "CAMERA" and len(bpy.data.cameras) == 1:
                 continue
-            if obj not in exclude or obj.name not in exclude:
+            if obj not in exclude and obj.name not in exclude:
                 bpy.data.objects.remove(obj)
         for mesh in bpy.data.meshes:
-            if mesh not in exclude or mesh.name not in exclude:
+            if mesh not in exclude and mesh.name not in exclude:
                 bpy.data.meshes.remove(mesh)
         for img in bpy.data.images:
-            if (img not in exclude or img.name not in exclude) and img.users == 0:
+            if (img not in exclude and img.name not in exclude) and img.users == 0:
                 bpy.data.images.remove(img)
 
 
@@ -2,9 +2,11 @@ import bpy
 import cv2
 import numpy as np
 import math
-from mathutils import Matrix
 import bmesh
-from pyblend.transform import circle2d_coords
+from concurrent.futures import ThreadPoolExecutor
+from pyblend.render import rainbow_palette
+from pyblend.camera import get_camera_para_batch
+from pyblend.transform import circle2d_coords, batch_project
 
 
 class COLOR_CONST:
@@ -33,41 +35,39 @@ class COLOR_CONST:
     ]  # little
 
 
+# BGRA colors scaled for cv2, built once
+COLOR_TABLE = np.concatenate([np.array(COLOR_CONST.colors)[:, ::-1], np.ones((len(COLOR_CONST.colors), 1))], axis=1)
+COLOR_TABLE = COLOR_TABLE * 255
+
+# box edges of obj_bbox(mode="box") corners, as ((start, end), color index)
+CORNER_LINKS = [
+    ((0, 1), 1),
+    ((1, 2), 2),
+    ((2, 3), 3),
+    ((3, 0), 4),
+    ((4, 5), 9),
+    ((5, 6), 10),
+    ((6, 7), 11),
+    ((7, 4), 12),
+    ((1, 5), 13),
+    ((3, 7), 14),
+    ((2, 6), 15),
+    ((0, 4), 16),
+]
+
+
 def plot_corner(image, coords_hw, vis=None, linewidth=2):
     """
     Plots a hand stick figure into a matplotlib figure.
     Reference: https://github.com/lixiny/ArtiBoost/blob/main/anakin/viztools/draw.py
     """
-    colors = np.array(COLOR_CONST.colors)  # 21 x 3
-    colors = colors[:, ::-1]  # BGR
-    colors = np.concatenate([colors, np.ones((colors.shape[0], 1))], axis=1)
-
-    # define connections and colors of the links
-    links = [
-        ((0, 1), colors[1, :]),
-        ((1, 2), colors[2, :]),
-        ((2, 3), colors[3, :]),
-        ((3, 0), colors[4, :]),
-        ((4, 5), colors[9, :]),
-        ((5, 6), colors[10, :]),
-        ((6, 7), colors[11, :]),
-        ((7, 4), colors[12, :]),
-        ((1, 5), colors[13, :]),
-        ((3, 7), colors[14, :]),
-        ((2, 6), colors[15, :]),
-        ((0, 4), colors[16, :]),
-    ]
-
+    links = [(connection, COLOR_TABLE[color] / 255) for connection, color in CORNER_LINKS]
     return plot_kps(image, coords_hw, links, vis, linewidth)
 
 
 def plot_kps(image, coords_hw, links, vis=None, linewidth=3):
     """Plots a hand stick figure into a matplotlib figure."""
 
-    colors = np.array(COLOR_CONST.colors)
-    colors = colors[:, ::-1]
-    colors = np.concatenate([colors, np.ones((colors.shape[0], 1))], axis=1)
-
     if vis is None:
         vis = np.ones_like(coords_hw[:, 0]) == 1.0
 
@@ -86,11 +86,102 @@ def plot_kps(image, coords_hw, links, vis=None, linewidth=3):
     for i in range(coords_hw.shape[0]):
         cx = int(coords_hw[i, 0])
         cy = int(coords_hw[i, 1])
-        cv2.circle(image, (cx, cy), radius=2 * linewidth, thickness=-1, color=colors[i, :] * 255)
+        cv2.circle(image, (cx, cy), radius=2 * linewidth, thickness=-1, color=COLOR_TABLE[i])
+
+    return image
+
+
+def draw_overlays(image, coords, links=CORNER_LINKS, vis=None, linewidth=2, draw_points=True):
+    """
+    Draw the keypoints and links of many objects into one image with one cv2.polylines
+    call per color, instead of one cv2.line / cv2.circle call per link and keypoint.
+
+    Args:
+        image (np.ndarray): (H, W, C) image, modified in place.
+        coords (np.ndarray): (M, K, 2) keypoints of M objects, e.g. batch_project output of one view.
+            Keypoints with NaN coordinates (behind the camera) are skipped.
+        links (List[Tuple[Tuple[int, int], int]], optional): ((start, end), color index into COLOR_TABLE).
+            Defaults to CORNER_LINKS (boxes).
+        vis (np.ndarray, optional): (M, K) visibility mask. Defaults to all finite keypoints.
+        linewidth (int, optional): line width, keypoints get radius 2 * linewidth. Defaults to 2.
+        draw_points (bool, optional): draw the keypoints, colored by index. Defaults to True.
+
+    Returns:
+        np.ndarray: the image.
+    """
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, np.shape(coords)[-2], 2)
+    valid = np.isfinite(coords).all(axis=-1)
+    if vis is not None:
+        valid &= np.asarray(vis, dtype=bool).reshape(valid.shape)
+    pixels = np.nan_to_num(coords).astype(np.int32)  # truncate like plot_kps
+
+    groups = {}
+    for (start, end), color in links:
+        groups.setdefault(color, []).append((start, end))
+    for color, pairs in groups.items():
+        pairs = np.array(pairs)  # (L, 2)
+        segments = pixels[:, pairs].reshape(-1, 2, 2)  # (M * L, 2, 2)
+        keep = valid[:, pairs].all(axis=-1).reshape(-1)
+        if keep.any():
+            cv2.polylines(image, list(segments[keep]), False, COLOR_TABLE[color], thickness=linewidth)
 
+    if draw_points:
+        # zero-length polylines with round caps draw filled discs
+        for i in range(coords.shape[1]):
+            keep = valid[:, i]
+            if keep.any():
+                dots = np.repeat(pixels[keep, i, None, :], 2, axis=1)  # (M, 2, 2)
+                cv2.polylines(image, list(dots), False, COLOR_TABLE[i % len(COLOR_TABLE)], thickness=4 * linewidth)
     return image
 
 
+def draw_overlays_batch(images, coords, links=CORNER_LINKS, vis=None, linewidth=2, draw_points=True, num_threads=8):
+    """
+    Run draw_overlays over a batch of frames in a thread pool (cv2 releases the GIL while drawing).
+
+    Args:
+        images (List[np.ndarray]): F images, modified in place.
+        coords (np.ndarray): (F, M, K, 2) keypoints.
+        vis (np.ndarray, optional): (F, M, K) visibility mask.
+        num_threads (int, optional): worker threads. Defaults to 8.
+
+    Returns:
+        List[np.ndarray]: the images.
+    """
+    vis = [None] * len(images) if vis is None else vis
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        return list(
+            pool.map(
+                lambda args: draw_overlays(args[0], args[1], links, args[2], linewidth, draw_points),
+                zip(images, coords, vis),
+            )
+        )
+
+
+def colorize_segmentation(index_map, palette=None, max_value=None):
+    """
+    Colorize a pass_index map with one vectorized lookup, reproducing the png of
+    enable_segmentation_render(mode="rainbow").
+
+    Args:
+        index_map (np.ndarray): (H, W) integer pass_index map, e.g. from the 16-bit png
+            (pixel value * 65535 for normalized readers) or the exr.
+        palette (np.ndarray, optional): (K, 3) lookup table, e.g. loaded from palette.npy.
+            Indices are wrapped into the table.
+        max_value (int, optional): build rainbow_palette(max_value) if palette is None.
+            Defaults to the largest index in index_map.
+
+    Returns:
+        np.ndarray: (H, W, 4) float32 RGBA image, alpha is 0 on the background (index 0).
+    """
+    index_map = np.rint(index_map).astype(np.int64)
+    if palette is None:
+        palette = rainbow_palette(max(int(max_value or index_map.max()), 1))
+    rgb = np.take(np.asarray(palette, dtype=np.float32), index_map, axis=0, mode="wrap")
+    alpha = (index_map > 0).astype(np.float32)[..., None]
+    return np.concatenate([rgb, alpha], axis=-1)
+
+
 def generate(mesh_type="VERTEX", length=1.0, subdivision=2):
     """
     Generates vertex and face data for a variety of geometric shapes.
@@ -375,22 +466,126 @@ def generate(mesh_type="VERTEX", length=1.0, subdivision=2):
         )
 
 
-def calc_mesh(pc_np, name="PointCloud", colors=None, mesh_type="TETRAHEDRON", length=1.0, subdivision=2):
+def _color_material(name, attribute_type="GEOMETRY"):
+    """
+    Diffuse material reading the "Col" color attribute.
+    """
+    mat = bpy.data.materials.new(name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    for n in nodes:
+        nodes.remove(n)
+    attr = nodes.new("ShaderNodeAttribute")
+    diff = nodes.new("ShaderNodeBsdfDiffuse")
+    attr.attribute_name = "Col"
+    attr.attribute_type = attribute_type
+    out = nodes.new("ShaderNodeOutputMaterial")
+    links.new(attr.outputs[0], diff.inputs[0])
+    links.new(diff.outputs[0], out.inputs[0])
+    return mat
+
+
+def _instance_node_group(name, template):
+    """
+    Geometry nodes tree instancing the template object on every input point.
+    """
+    ng = bpy.data.node_groups.new(name, "GeometryNodeTree")
+    if hasattr(ng, "interface"):  # Blender 4.0+
+        ng.interface.new_socket("Geometry", in_out="INPUT", socket_type="NodeSocketGeometry")
+        ng.interface.new_socket("Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry")
+    else:
+        ng.inputs.new("NodeSocketGeometry", "Geometry")
+        ng.outputs.new("NodeSocketGeometry", "Geometry")
+    nodes = ng.nodes
+    links = ng.links
+    group_in = nodes.new("NodeGroupInput")
+    group_out = nodes.new("NodeGroupOutput")
+    info = nodes.new("GeometryNodeObjectInfo")
+    info.inputs["Object"].default_value = template
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    links.new(group_in.outputs[0], instance.inputs["Points"])
+    links.new(info.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(instance.outputs["Instances"], group_out.inputs[0])
+    return ng
+
+
+def calc_instances(pc_np, name="PointCloud", colors=None, mesh_type="TETRAHEDRON", length=1.0, subdivision=2):
+    """
+    Creates a point cloud object that instances a template mesh on every point with a
+    geometry nodes "Instance on Points" modifier. Only the points are stored, so memory
+    does not grow with the template size and Cycles renders the copies as instances.
+
+    Args:
+        pc_np (ndarray): Input point cloud data.
+        name (str): Name of the point cloud object.
+        colors (ndarray): Optional (N, 3) or (N, 4) colors in [0, 1], one per point.
+        mesh_type (str): Type of the template. One of "VERTEX", "TRIANGLE", "TETRAHEDRON", "CUBE", "ICOSPHERE".
+        length (float): Length / radius of the template.
+        subdivision (int): Subdivision level of the template, only used for "ICOSPHERE".
+    """
+    # ======== Creating Template Object ========
+    gv, _, gf = generate(mesh_type=mesh_type, length=length, subdivision=subdivision)
+    template_me = bpy.data.meshes.new(f"{name}_template")
+    template_me.from_pydata(gv, [], gf)
+    template = bpy.data.objects.new(f"{name}_template", template_me)
+
+    # ======== Creating Point Mesh ========
+    points = np.asarray(pc_np[:, :3], dtype=np.float32)
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(points))
+    me.vertices.foreach_set("co", points.reshape(-1))
+    o = bpy.data.objects.new(name, me)
+
+    # Add objects to scene, the template is only referenced by the modifier
+    view_layer = bpy.context.view_layer
+    collection = view_layer.active_layer_collection.collection
+    collection.objects.link(template)
+    template.hide_render = True
+    template.hide_viewport = True
+    collection.objects.link(o)
+    for i in bpy.context.scene.objects:
+        i.select_set(False)
+    o.select_set(True)
+    view_layer.objects.active = o
+
+    mod = o.modifiers.new(name, "NODES")
+    mod.node_group = _instance_node_group(name, template)
+
+    # ======== Applying Colors to Instances ========
+    if colors is not None:
+        colors = np.asarray(colors, dtype=np.float32)
+        if colors.shape[1] == 3:
+            colors = np.concatenate([colors, np.ones((len(colors), 1), dtype=np.float32)], axis=1)
+        attr = me.attributes.new("Col", "FLOAT_COLOR", "POINT")
+        attr.data.foreach_set("color", colors.reshape(-1))
+        template_me.materials.append(_color_material(name, attribute_type="INSTANCER"))
+
+    return o
+
+
+def calc_mesh(
+    pc_np, name="PointCloud", colors=None, mesh_type="TETRAHEDRON", length=1.0, subdivision=2, mode="mesh"
+):
     """
     Creates a mesh object in Blender based on input point cloud data and optional color information.
 
     Args:
         pc_np (ndarray): Input point cloud data.
         name (str): Name of the mesh object.
-        colors (ndarray): Optional color information.
+        colors (ndarray): Optional (N, 3) or (N, 4) colors in [0, 1], one per point.
         mesh_type (str): Type of the mesh. One of "VERTEX", "TRIANGLE", "TETRAHEDRON", "CUBE", "ICOSPHERE".
         length (float): Length / radius of the mesh.
         subdivision (int): Subdivision level of the mesh, only used for "ICOSPHERE".
+        mode (str): "mesh" builds one triangle mesh with a copy of the template per point,
+            "instances" uses geometry nodes instancing instead, see calc_instances.
 
     Reference: https://github.com/uhlik/bpy/blob/6fa219343cd3f9e230500ebb63f805c0648de8ab/space_view3d_point_cloud_visualizer.py
     """
-    # ======== Preparing Translation Matrices from Point Cloud ========
-    matrices = [Matrix.Translation(point) for point in pc_np[:, :3]]
+    if mode == "instances":
+        return calc_instances(pc_np, name, colors, mesh_type, length, subdivision)
+    elif mode != "mesh":
+        raise ValueError(f"Unknown mode {mode}")
 
     # ======== Triangulating Mesh Faces ========
     gv, _, gf = generate(mesh_type=mesh_type, length=length, subdivision=subdivision)
@@ -409,24 +604,14 @@ def calc_mesh(pc_np, name="PointCloud", colors=None, mesh_type="TETRAHEDRON", le
     gf = np.zeros((len(me.polygons) * 3), dtype=np.int32)
     me.polygons.foreach_get("vertices", gf)
     gf.shape = (len(me.polygons), 3)
-    zgv = gv.reshape(-1)
-
-    # ======== Applying Transformations to Mesh Geometry ========
-    vs = np.zeros((len(matrices) * len(gv) * 3), dtype=np.float32)
-    fs = np.zeros((len(matrices) * len(gf) * 3), dtype=np.int32)
-    cos = np.zeros((len(me.vertices) * 3), dtype=np.float32)
-    fis = np.zeros((len(me.polygons) * 3), dtype=np.int32)
-    for i, m in enumerate(matrices):
-        # doesn't work when passing ndarray directly
-        me.transform(Matrix(m))
-        me.vertices.foreach_get("co", cos)
-        vs[i * len(cos) : (i * len(cos)) + len(cos)] = cos
-        me.polygons.foreach_get("vertices", fis)
-        fis += (i * len(me.vertices),)
-        fs[i * len(fis) : (i * len(fis)) + len(fis)] = fis
-        me.vertices.foreach_set("co", zgv)
     bpy.data.meshes.remove(me)
 
+    # ======== Instancing the Template at Every Point ========
+    points = np.asarray(pc_np[:, :3], dtype=np.float32)  # (N, 3)
+    vs = (points[:, None, :] + gv[None, :, :]).reshape(-1)  # (N * V * 3,)
+    offsets = np.arange(len(points), dtype=np.int32) * len(gv)  # first vertex of each instance
+    fs = (gf[None, :, :] + offsets[:, None, None]).reshape(-1)  # (N * F * 3,)
+
     # ======== Creating Final Mesh Object ========
     me = bpy.data.meshes.new(name)
     vl = int(len(vs) / 3)
@@ -455,22 +640,286 @@ def calc_mesh(pc_np, name="PointCloud", colors=None, mesh_type="TETRAHEDRON", le
 
     # ======== Applying Colors to Mesh ========
     if colors is not None:
-        mat = bpy.data.materials.new(name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        for n in nodes:
-            nodes.remove(n)
-        attr = nodes.new("ShaderNodeAttribute")
-        diff = nodes.new("ShaderNodeBsdfDiffuse")
-        attr.attribute_name = "Col"
-        out = nodes.new("ShaderNodeOutputMaterial")
-        links.new(attr.outputs[0], diff.inputs[0])
-        links.new(diff.outputs[0], out.inputs[0])
-        o.data.materials.append(mat)
-        colors = np.repeat(colors, len(gf) * 3, axis=0)
+        o.data.materials.append(_color_material(name))
+        colors = np.asarray(colors, dtype=np.float32)
+        if colors.shape[1] == 3:
+            colors = np.concatenate([colors, np.ones((len(colors), 1), dtype=np.float32)], axis=1)
+        colors = np.repeat(colors, len(gf) * 3, axis=0)  # one color per loop
         colors = colors.reshape(-1)
         vc = o.data.vertex_colors.new()
         vc.data.foreach_set("color", colors)
 
     return o
+
+
+PLY_TYPES = {
+    "char": "i1",
+    "uchar": "u1",
+    "short": "i2",
+    "ushort": "u2",
+    "int": "i4",
+    "uint": "u4",
+    "float": "f4",
+    "double": "f8",
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
+
+def _read_ply_header(path):
+    """
+    Parse the header of a binary ply point cloud.
+
+    Returns:
+        Tuple[np.dtype, int, int]: vertex dtype, vertex count and byte offset of the vertex data.
+    """
+    with open(path, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"{path} is not a ply file")
+        fmt, count, fields, element = None, 0, [], None
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path} has no end_header")
+            words = line.decode("ascii").split()
+            if not words:
+                continue
+            if words[0] == "format":
+                fmt = words[1]
+            elif words[0] == "element":
+                element = words[1]
+                if element == "vertex":
+                    count = int(words[2])
+                elif count == 0:
+                    raise ValueError("the vertex element must come first")
+            elif words[0] == "property" and element == "vertex":
+                if words[1] == "list":
+                    raise ValueError("list properties are not supported for vertices")
+                fields.append((words[2], PLY_TYPES[words[1]]))
+            elif words[0] == "end_header":
+                offset = f.tell()
+                break
+    if fmt == "binary_little_endian":
+        order = "<"
+    elif fmt == "binary_big_endian":
+        order = ">"
+    else:
+        raise ValueError(f"only binary ply files can be memory-mapped, got {fmt}")
+    return np.dtype([(field, order + dtype) for field, dtype in fields]), count, offset
+
+
+def open_point_cloud(path):
+    """
+    Memory-map a point cloud without reading it.
+
+    Args:
+        path (str): .npy file holding an (N, 3+) array (xyz, optionally rgb in [0, 1]) or a binary .ply.
+
+    Returns:
+        np.ndarray: (N, C) array for .npy, structured array with x, y, z (and red, green, blue) for .ply.
+    """
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    elif path.endswith(".ply"):
+        dtype, count, offset = _read_ply_header(path)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    else:
+        raise ValueError(f"Unknown point cloud format {path}")
+
+
+def iter_point_chunks(cloud, chunk_size=1000000, stride=1):
+    """
+    Iterate over a (memory-mapped) point cloud chunk by chunk, only converting one chunk at a time.
+
+    Args:
+        cloud (np.ndarray or str): array from open_point_cloud, an (N, 3+) array or a path.
+        chunk_size (int, optional): points read per chunk, before striding. Defaults to 1e6.
+        stride (int, optional): keep every stride-th point (level of detail). Defaults to 1.
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: (n, 3) float32 points and (n, 3) float32 colors in [0, 1] or None.
+    """
+    if isinstance(cloud, str):
+        cloud = open_point_cloud(cloud)
+    for start in range(0, len(cloud), chunk_size):
+        chunk = cloud[start : start + chunk_size : stride]
+        if chunk.dtype.names is not None:
+            points = np.stack([chunk["x"], chunk["y"], chunk["z"]], axis=1).astype(np.float32)
+            colors = None
+            if "red" in chunk.dtype.names:
+                colors = np.stack([chunk["red"], chunk["green"], chunk["blue"]], axis=1).astype(np.float32)
+                if chunk.dtype["red"].kind in "ui":
+                    colors /= np.iinfo(chunk.dtype["red"]).max
+        else:
+            points = np.asarray(chunk[:, :3], dtype=np.float32)
+            colors = np.asarray(chunk[:, 3:6], dtype=np.float32) if chunk.shape[1] >= 6 else None
+        yield points, colors
+
+
+def voxel_downsample(points, voxel_size, colors=None, weights=None, return_counts=False):
+    """
+    Replace the points of every occupied voxel by their mean.
+
+    Args:
+        points (np.ndarray): (N, 3) points.
+        voxel_size (float): voxel edge length.
+        colors (np.ndarray, optional): (N, C) colors, averaged the same way.
+        weights (np.ndarray, optional): (N,) point weights, e.g. the counts of an earlier pass
+            when merging already downsampled points. Defaults to None (all ones).
+        return_counts (bool, optional): also return the total weight of every voxel. Defaults to False.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (M, 3) float32 points and (M, C) colors or None,
+            plus the (M,) float64 counts if return_counts.
+    """
+    if len(points) == 0:
+        counts = np.zeros(0, dtype=np.float64)
+        return (points, colors, counts) if return_counts else (points, colors)
+    keys = np.floor(points / voxel_size).astype(np.int64)
+    points, colors, counts = _merge_bins(keys, points, colors, weights)
+    return (points, colors, counts) if return_counts else (points, colors)
+
+
+def _merge_bins(keys, points, colors=None, weights=None):
+    """
+    Weighted average of the points (and colors) sharing the same row of integer keys.
+    Returns the points, the colors and the (M,) total weight of every bin.
+    """
+    # fold the key columns into one int64 so np.unique sorts scalars instead of rows
+    keys = keys - keys.min(axis=0)
+    extents = keys.max(axis=0) + 1
+    if np.prod(extents.astype(np.float64)) < 2**62:
+        flat = keys[:, 0]
+        for k in range(1, keys.shape[1]):
+            flat = flat * extents[k] + keys[:, k]
+    else:  # too many bins for one int64, fall back to sorting rows
+        _, flat = np.unique(keys, axis=0, return_inverse=True)
+    _, inverse = np.unique(flat.reshape(-1), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse, weights=weights)
+
+    def mean(values):
+        values = values if weights is None else values * weights[:, None]
+        sums = np.stack([np.bincount(inverse, values[:, c], len(counts)) for c in range(values.shape[1])], axis=1)
+        return (sums / counts[:, None]).astype(np.float32)
+
+    return mean(points), (mean(colors) if colors is not None else None), counts
+
+
+def screen_space_decimate(
+    points,
+    colors=None,
+    camera=None,
+    camera_para=None,
+    width=None,
+    height=None,
+    pixel_size=1.0,
+    depth_tolerance=0.01,
+    near=1e-3,
+    far=None,
+):
+    """
+    Cull the points outside the camera frustum and merge the points that fall into the
+    same pixel and depth bin, averaging their positions and colors. Depth bins grow
+    with distance (depth_tolerance is relative), so far regions are decimated most.
+
+    Args:
+        points (np.ndarray): (N, 3) world-space points.
+        colors (np.ndarray, optional): (N, C) colors.
+        camera (bpy.types.Object, optional): camera object. Defaults to bpy.data.objects["Camera"].
+        camera_para (dict, optional): "intrinsic" (3, 3) and "extrinsic" (4, 4) to use instead of camera.
+        width (int, optional): image width. Defaults to the scene resolution.
+        height (int, optional): image height. Defaults to the scene resolution.
+        pixel_size (float, optional): screen bin size in pixels. Defaults to 1.
+        depth_tolerance (float, optional): relative depth bin size. Defaults to 0.01.
+        near (float, optional): near clipping distance. Defaults to 1e-3.
+        far (float, optional): far clipping distance. Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (M, 3) float32 points and (M, C) colors or None.
+    """
+    if camera_para is None:
+        camera = camera if camera is not None else bpy.data.objects["Camera"]
+        camera_para = get_camera_para_batch(camera, poses=np.array(camera.matrix_world)[None])
+    intrinsic = np.asarray(camera_para["intrinsic"]).reshape(-1, 3, 3)[:1]
+    extrinsic = np.asarray(camera_para["extrinsic"]).reshape(-1, 4, 4)[:1]
+    points = np.asarray(points, dtype=np.float32)
+    points2d, depth, mask = batch_project(points[None], extrinsic, intrinsic, width, height, near, far)
+    points2d, depth, mask = points2d[0, 0], depth[0, 0], mask[0, 0]
+    points = points[mask]
+    colors = np.asarray(colors, dtype=np.float32)[mask] if colors is not None else None
+    keys = np.empty((len(points), 3), dtype=np.int64)
+    keys[:, :2] = np.floor(points2d[mask] / pixel_size)
+    keys[:, 2] = np.floor(np.log(depth[mask]) / np.log1p(depth_tolerance))
+    if len(points) == 0:
+        return points, colors
+    return _merge_bins(keys, points, colors)[:2]
+
+
+def calc_mesh_chunked(
+    cloud,
+    name="PointCloud",
+    chunk_size=500000,
+    voxel_size=None,
+    max_points=None,
+    use_colors=True,
+    decimate=None,
+    **kwargs,
+):
+    """
+    Build a point cloud larger than memory (or than one Blender mesh comfortably holds)
+    as several calc_mesh objects parented to an empty. Points are streamed from a
+    memory-mapped file, so peak memory is bounded by one chunk (plus the downsampled
+    cloud when voxel_size is set).
+
+    Args:
+        cloud (str or np.ndarray): .npy / binary .ply path, or an array, see open_point_cloud.
+        name (str): name of the parent empty, chunks are named {name}_0000, ...
+        chunk_size (int): points per object. Defaults to 5e5.
+        voxel_size (float, optional): voxel-downsample the cloud first. Defaults to None.
+        max_points (int, optional): keep about max_points points by striding (level of detail). Defaults to None.
+        use_colors (bool): color the points if the cloud has colors. Defaults to True.
+        decimate (dict, optional): arguments of screen_space_decimate applied to every chunk,
+            e.g. {"pixel_size": 2}. Defaults to None (no decimation).
+        **kwargs: forwarded to calc_mesh, e.g. mesh_type, length or mode="instances".
+
+    Returns:
+        bpy.types.Object: the parent empty.
+    """
+    if isinstance(cloud, str):
+        cloud = open_point_cloud(cloud)
+    stride = max(1, math.ceil(len(cloud) / max_points)) if max_points else 1
+
+    def chunks():
+        if voxel_size is None:
+            yield from iter_point_chunks(cloud, chunk_size * stride, stride)
+            return
+        # downsample every chunk, then once more globally for voxels split across chunks,
+        # weighting every chunk mean by the number of points behind it
+        parts = [
+            voxel_downsample(p, voxel_size, c, return_counts=True)
+            for p, c in iter_point_chunks(cloud, chunk_size * stride, stride)
+        ]
+        points = np.concatenate([p for p, _, _ in parts]) if parts else np.zeros((0, 3), dtype=np.float32)
+        colors = np.concatenate([c for _, c, _ in parts]) if parts and parts[0][1] is not None else None
+        counts = np.concatenate([n for _, _, n in parts]) if parts else None
+        points, colors = voxel_downsample(points, voxel_size, colors, weights=counts)
+        for start in range(0, len(points), chunk_size):
+            yield points[start : start + chunk_size], None if colors is None else colors[start : start + chunk_size]
+
+    parent = bpy.data.objects.new(name, None)
+    bpy.context.view_layer.active_layer_collection.collection.objects.link(parent)
+    for i, (points, colors) in enumerate(chunks()):
+        if decimate is not None:
+            points, colors = screen_space_decimate(points, colors, **decimate)
+        if len(points) == 0:
+            continue
+        o = calc_mesh(points, f"{name}_{i:04d}", colors if use_colors else None, **kwargs)
+        o.parent = parent
+    return parent
@@ -0,0 +1,257 @@
+"""
+A long-lived render worker that keeps one Blender process alive across many jobs.
+
+Launching Blender, registering addons and configuring the render engine is paid
+once; afterwards the worker reads JSON job specs (one per line) from stdin or a
+local socket, renders them and streams back one completion record per job.
+
+Start a worker reading jobs from stdin:
+>>> blender_app -b -P pyblend/worker.py -noaudio -- --res_x 320 --res_y 240
+
+or listening on a local socket:
+>>> blender_app -b -P pyblend/worker.py -noaudio -- --port 5555
+
+A job spec looks like:
+>>> {
+...     "id": "scene_0000",
+...     "assets": [{"path": "docs/bunny.obj", "normalize": true}],
+...     "cameras": [[0, -6, 2], [6, 0, 2]],
+...     "target": [0, 0, 0],
+...     "passes": ["depth", "normal", "segmentation"],
+...     "output": "tmp/worker/scene_0000",
+... }
+
+With a "seed", object poses, materials and the world are randomized by
+pyblend.sampler.SceneSampler and the record is saved to {output}/scene.json;
+"cameras" may then be replaced by "num_views" sampled locations.
+
+Blender prints its own logs to stdout, so every record is written on a single
+line starting with RECORD_PREFIX.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import traceback
+import bpy
+from mathutils import Matrix
+from pyblend.object import AssetCache, AssetPool, load_obj
+from pyblend.find import find_all_objects
+from pyblend.transform import normalize_obj
+from pyblend.lighting import config_world, create_light
+from pyblend.utils import BlenderRemover, ArgumentParserForBlender
+from pyblend.compositor import build_compositor
+from pyblend.render import config_render, render_views
+from pyblend.sampler import SceneSampler, save_record
+
+RECORD_PREFIX = "@pyblend "
+# datablocks a job may leave behind once its objects are removed by clear_all
+ORPHAN_DATA = ("lights", "cameras", "actions", "textures", "node_groups")
+
+
+def validate_job(job):
+    """
+    Check the fields a job needs before rendering it.
+
+    Returns:
+        str: the problem with the job, or None if it can be rendered.
+    """
+    if "output" not in job:
+        return "job has no \"output\""
+    cameras = job.get("cameras")
+    if cameras is not None and len(cameras) == 0:
+        return "job has an empty \"cameras\" list"
+    if cameras is None and not ("seed" in job and job.get("num_views", 0) > 0):
+        return "job needs \"cameras\", or a \"seed\" with \"num_views\" > 0 to sample them"
+    return None
+
+
+class RenderWorker:
+    """
+    Render jobs one after another in the current Blender process.
+
+    The render engine is configured once in the constructor. Compositor nodes of
+    the requested passes are kept across jobs by build_compositor, later jobs
+    only retarget their output paths. The scene is reset with
+    BlenderRemover.clear_all after every job and the light, camera and animation
+    data it leaves without users is removed; assets kept in the optional
+    AssetPool survive the reset.
+
+    >>> worker = RenderWorker(res_x=320, res_y=240)
+    >>> record = worker.run({"id": "0", "assets": [...], "cameras": [...], "output": "tmp/0"})
+    """
+
+    def __init__(
+        self,
+        res_x=320,
+        res_y=240,
+        engine="CYCLES",
+        transparent=False,
+        enable_gpu=True,
+        world_strength=0.3,
+        max_index=10,
+        cache_dir=None,
+        pool_bytes=None,
+        profile="dataset",
+    ):
+        config_render(
+            res_x=res_x, res_y=res_y, engine=engine, transparent=transparent, enable_gpu=enable_gpu, profile=profile
+        )
+        self.remover = BlenderRemover()
+        self.remover.clear_all()
+        self.world_strength = world_strength
+        self.max_index = max_index
+        self.cache = AssetCache(cache_dir) if cache_dir is not None else None
+        self.pool = AssetPool(pool_bytes, cache=self.cache) if pool_bytes is not None else None
+        self.camera = bpy.data.objects["Camera"]
+
+    def _remove_orphans(self, exclude=()):
+        """
+        Remove the datablocks of ORPHAN_DATA without users, e.g. the light data left by create_light.
+        """
+        for attr in ORPHAN_DATA:
+            collection = getattr(bpy.data, attr)
+            for block in list(collection):
+                if block.users == 0 and block not in exclude:
+                    collection.remove(block)
+
+    def _setup_passes(self, passes, output):
+        options = {"depth": {"reverse": True}, "normal": {}, "segmentation": {"max_value": self.max_index}}
+        build_compositor({name: dict(options.get(name, {}), base_path=output) for name in passes})
+
+    def _load_assets(self, assets):
+        objs = []
+        for ii, asset in enumerate(assets):
+            name = asset.get("name", f"object_{ii}")
+            center, join = asset.get("center", False), asset.get("join", True)
+            if self.pool is not None:
+                obj = self.pool.acquire(asset["path"], name, center=center, join=join)
+            else:
+                obj = load_obj(asset["path"], name, center=center, join=join, cache=self.cache)
+            if asset.get("normalize", True):
+                obj.location = (0, 0, 0)
+                normalize_obj(obj)
+            for o in find_all_objects(obj):
+                o.pass_index = asset.get("pass_index", ii + 1)
+            if "matrix" in asset:
+                obj.matrix_world = Matrix(asset["matrix"]) @ obj.matrix_world
+            bpy.context.view_layer.update()
+            objs.append(obj)
+        return objs
+
+    def _render(self, job):
+        output = job["output"]
+        os.makedirs(output, exist_ok=True)
+        self._setup_passes(job.get("passes", []), output)
+        world_strength = job.get("world_strength", self.world_strength)
+        config_world(world_strength)
+        for light in job.get("lights", []):
+            create_light(**light)
+        objs = self._load_assets(job.get("assets", []))
+        cameras = job.get("cameras")
+        if "seed" in job:
+            sampler = SceneSampler(job["seed"], world_strength=(world_strength, world_strength))
+            scene = sampler.draw(len(objs), num_views=job.get("num_views", 0))
+            sampler.apply(scene, objs)
+            save_record(scene, os.path.join(output, "scene.json"))
+            if cameras is None:
+                cameras = scene["cameras"]
+
+        # all views in one animation render, pass outputs are numbered by frame as before
+        target = job.get("target", (0, 0, 0))
+        meta = render_views(self.camera, cameras, os.path.join(output, "rgb_####.png"), target)
+        return [
+            {
+                "rgb": os.path.join(output, f"rgb_{i:04d}.png"),
+                "intrinsic": meta["intrinsic"][i].tolist(),
+                "extrinsic": meta["extrinsic"][i].tolist(),
+            }
+            for i in range(len(cameras))
+        ]
+
+    def run(self, job):
+        """
+        Render a single job and return its completion record.
+
+        Args:
+            job (dict): job spec, see the module docstring.
+
+        Returns:
+            dict: record with "id", "status" ("ok" or "error"), "frames", "time" and, on failure, "error".
+        """
+        start = time.time()
+        record = {"id": job.get("id"), "status": "ok"}
+        error = validate_job(job)
+        if error is not None:
+            record.update(status="error", error=error, time=0.0)
+            return record
+        try:
+            record["frames"] = self._render(job)
+        except Exception:
+            record["status"] = "error"
+            record["error"] = traceback.format_exc()
+        finally:
+            exclude = self.pool.datablocks() if self.pool is not None else []
+            self.remover.clear_all(exclude=exclude)
+            self._remove_orphans(exclude)
+        record["time"] = time.time() - start
+        return record
+
+    def serve_stream(self, instream=sys.stdin, outstream=sys.stdout):
+        """
+        Read one JSON job per line from instream until EOF and write records to outstream.
+        """
+        for line in instream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError:
+                record = {"id": None, "status": "error", "error": f"invalid job: {line}"}
+            else:
+                record = self.run(job)
+            outstream.write(RECORD_PREFIX + json.dumps(record) + "\n")
+            outstream.flush()
+
+    def serve_socket(self, host="127.0.0.1", port=5555):
+        """
+        Accept connections on host:port one at a time and serve each of them as a job stream.
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host, port))
+            server.listen(1)
+            print(f"Worker listening on {host}:{port}")
+            while True:
+                conn, _ = server.accept()
+                with conn, conn.makefile("r") as instream, conn.makefile("w") as outstream:
+                    self.serve_stream(instream, outstream)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParserForBlender()
+    parser.add_argument("--res_x", type=int, default=320)
+    parser.add_argument("--res_y", type=int, default=240)
+    parser.add_argument("--max_index", type=int, default=10)
+    parser.add_argument("--cpu", action="store_true")
+    parser.add_argument("--profile", type=str, default="dataset", help="render profile, see RENDER_PROFILES")
+    parser.add_argument("--cache_dir", type=str, default=None)
+    parser.add_argument("--pool_size", type=float, default=None, help="in-memory asset pool budget in GB")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+    worker = RenderWorker(
+        res_x=args.res_x,
+        res_y=args.res_y,
+        enable_gpu=not args.cpu,
+        max_index=args.max_index,
+        cache_dir=args.cache_dir,
+        pool_bytes=int(args.pool_size * 2**30) if args.pool_size is not None else None,
+        profile=args.profile,
+    )
+    if args.port is None:
+        worker.serve_stream(sys.stdin, sys.stdout)
+    else:
+        worker.serve_socket(args.host, args.port)
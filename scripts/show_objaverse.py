@@ -3,16 +3,16 @@ import bpy
 import random
 import objaverse
 import numpy as np
-from pyblend.object import load_obj
-from pyblend.viztools import plot_corner
+from pyblend.object import AssetCache, AssetPool
+from pyblend.viztools import draw_overlays_batch
 from pyblend.find import find_all_objects
 from pyblend.lighting import config_world
-from pyblend.camera import get_camera_para
 from pyblend.utils import BlenderRemover, ArgumentParserForBlender
-from pyblend.transform import look_at, normalize_obj, random_loc, obj_bbox, random_transform, persp_project
+from pyblend.camera import get_camera_para_batch
+from pyblend.transform import normalize_obj, random_loc, obj_bbox, random_transform, batch_project, views_in_frame
 from pyblend.render import (
     config_render,
-    render_image,
+    render_views,
     enable_segmentation_render,
     enable_depth_render,
     enable_normal_render,
@@ -41,6 +41,8 @@ def main(args):
     remover.clear_all()
     config_world(0.3)
     camera = bpy.data.objects["Camera"]
+    cache = AssetCache(args.cache_dir) if args.cache_dir is not None else None
+    pool = AssetPool(max_bytes=int(args.pool_size * 2**30), cache=cache)
     exr_seg_node, png_seg_node = enable_segmentation_render("tmp/objaverse", max_value=args.num_obj)
     exr_depth_node, png_depth_node = enable_depth_render("tmp/objaverse", reverse=True)
     png_normal_node = enable_normal_render("tmp/objaverse")
@@ -56,7 +58,7 @@ def main(args):
         bbox_list = []
         for ii, (uid, path) in enumerate(objects.items()):
             # load object
-            obj = load_obj(path, "object", center=False, join=True)
+            obj = pool.acquire(path, "object", center=False, join=True)
             obj.location = (0, 0, 0)
             normalize_obj(obj)
             for obj in find_all_objects(obj):
@@ -66,29 +68,23 @@ def main(args):
             bbox_list.append(bbox)
 
         # ======== Render ========
-        for camera_idx in range(args.num_views):
-            camera.location = random_loc((0, 0, 0), (8, 8), theta=(-1, 1), phi=(0, 1))
-            look_at(camera, (0, 0, 0))
-            bpy.context.view_layer.update()
-            camera_para = get_camera_para(camera)
-            intr = camera_para["intrinsic"]  # (3, 3)
-            extr = camera_para["extrinsic"]  # (4, 4)
-            bbox2d_list = []
-            for bbox in bbox_list:
-                bbox2cam = extr.dot(np.concatenate([bbox, np.ones((8, 1))], axis=1).transpose()).transpose()[
-                    :, :3
-                ]  # (8, 3)
-                bbox2d = persp_project(bbox2cam, intr)  # (8, 2)
-                bbox2d_list.append(bbox2d)
-            bpy.context.scene.frame_current = scene_idx * args.num_views + camera_idx
-            render_image(f"tmp/objaverse/out_{scene_idx * args.num_views + camera_idx:04d}.png")
-            image = cv2.imread(
-                f"tmp/objaverse/out_{scene_idx * args.num_views + camera_idx:04d}.png", cv2.IMREAD_UNCHANGED
-            )
-            for bbox2d in bbox2d_list:
-                image = plot_corner(image, bbox2d, linewidth=1)
-            cv2.imwrite(f"tmp/objaverse/out_bbox_{scene_idx * args.num_views + camera_idx:04d}.png", image)
-        remover.clear_all()
+        frame_start = scene_idx * args.num_views
+        bboxes = np.stack(bbox_list)  # (M, 8, 3)
+        candidates = np.array(
+            [random_loc((0, 0, 0), (8, 8), theta=(-1, 1), phi=(0, 1)) for _ in range(args.num_views * 4)]
+        )
+        # reject views where objects leave the frame before rendering them
+        candidate_para = get_camera_para_batch(camera, candidates)
+        keep = views_in_frame(bboxes, candidate_para["extrinsic"], candidate_para["intrinsic"])
+        locations = np.concatenate([candidates[keep], candidates[~keep]])[: args.num_views]
+        camera_para = render_views(camera, locations, "tmp/objaverse/out_####.png", frame_start=frame_start)
+        bboxes2d, _, _ = batch_project(bboxes, camera_para["extrinsic"], camera_para["intrinsic"])  # (V, M, 8, 2)
+        frames = range(frame_start, frame_start + args.num_views)
+        images = [cv2.imread(f"tmp/objaverse/out_{frame:04d}.png", cv2.IMREAD_UNCHANGED) for frame in frames]
+        images = draw_overlays_batch(images, bboxes2d, linewidth=1)
+        for frame, image in zip(frames, images):
+            cv2.imwrite(f"tmp/objaverse/out_bbox_{frame:04d}.png", image)
+        remover.clear_all(exclude=pool.datablocks())
 
 
 if __name__ == "__main__":
@@ -96,5 +92,7 @@ if __name__ == "__main__":
     args = parser.add_argument("--num_scene", type=int, default=10)
     args = parser.add_argument("--num_obj", type=int, default=10)
     args = parser.add_argument("--num_views", type=int, default=2)
+    args = parser.add_argument("--cache_dir", type=str, default=None)
+    args = parser.add_argument("--pool_size", type=float, default=4, help="asset pool budget in GB")
     args = parser.parse_args()
     main(args)